@@ -0,0 +1,60 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# real compilations, not the entries left in the shared cache by others
+cache_dir = tempfile.TemporaryDirectory(prefix="interactive_zserio_test_cache_")
+os.environ["INTERACTIVE_ZSERIO_CACHE_DIR"] = cache_dir.name
+
+from interactive_zserio import batch
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+tmp_dir = tempfile.TemporaryDirectory()
+inputs_dir = os.path.join(tmp_dir.name, "inputs")
+output_dir = os.path.join(tmp_dir.name, "output")
+
+write(os.path.join(inputs_dir, "valid", "zs", "valid.zs"), "package valid;\n\nstruct A { uint8 a; };\n")
+write(os.path.join(inputs_dir, "invalid", "invalid.zs"), "package invalid;\n\nstruct A { unknown a; };\n")
+write(os.path.join(inputs_dir, "broken.zip"), "not a zip")
+write(os.path.join(inputs_dir, "schema.txt"), "")
+inputs = [os.path.join(inputs_dir, name) for name in ("valid", "invalid", "broken.zip", "schema.txt")]
+
+# failing inputs are recorded in the summary, the others are compiled and the exit code reports the failures
+summary_path = os.path.join(tmp_dir.name, "summary.json")
+completed_process = subprocess.run([sys.executable, "-m", "interactive_zserio.batch", *inputs, "-o", output_dir,
+                                    "-s", summary_path, "-j", "2"], capture_output=True, text=True)
+assert completed_process.returncode == 1, completed_process.stderr
+assert "Traceback" not in completed_process.stderr, completed_process.stderr
+with open(summary_path) as f:
+    summary = json.load(f)
+assert summary["ok"] == 1 and summary["failed"] == 3, summary
+valid, invalid, broken, schema = summary["inputs"]
+assert valid["status"] == "ok", valid
+assert valid["main_file"] == "valid.zs"
+assert valid["generators"]["python"]["returncode"] == 0
+assert valid["generators"]["python"]["source"] != "cached"
+assert os.path.isdir(os.path.join(output_dir, "valid", "python", "valid"))
+assert invalid["status"] == "failed", invalid
+assert any("] invalid.zs:3:12:" in line for line in invalid["diagnostics"]), invalid["diagnostics"]
+assert broken["status"] == "error" and "zip" in broken["error"], broken
+assert schema["status"] == "error" and "directory or a *.zip" in schema["error"], schema
+
+# unexpected exceptions don't escape and are recorded as well
+class FailingCompileService:
+    def __init__(self, zs_dir, output_dir):
+        pass
+
+    def compile(self, *args):
+        raise RuntimeError("unexpected")
+
+batch.CompileService = FailingCompileService
+summary = batch.compile_input(inputs[0], None, ["python"], "")
+assert summary["status"] == "error", summary
+assert summary["error"] == "RuntimeError: unexpected", summary
+assert summary["main_file"] == "valid.zs"
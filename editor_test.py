@@ -0,0 +1,80 @@
+import os
+import tempfile
+import threading
+
+from interactive_zserio import editor
+from interactive_zserio.editor import Editor
+from interactive_zserio.schema_index import SchemaIndex
+
+def read(path):
+    with open(os.path.join(zs_dir, path)) as f:
+        return f.read()
+
+def render(content):
+    # st_ace returns the content of the editor
+    editor.st_ace = lambda *args, **kwargs: content
+    schema_editor.render()
+
+def content_callback(file_path, content, content_hash):
+    schema_index.update(file_path, content, content_hash)
+
+tmp_dir = tempfile.TemporaryDirectory()
+zs_dir = tmp_dir.name
+with open(os.path.join(zs_dir, "main.zs"), "w") as f:
+    f.write("package main;\n")
+os.chmod(os.path.join(zs_dir, "main.zs"), 0o640)
+
+schema_index = SchemaIndex(zs_dir)
+flushed = []
+schema_editor = Editor("schema_editor", zs_dir, edit_callback=content_callback,
+                       flush_callback=lambda *args: (flushed.append(args[1]), content_callback(*args)))
+schema_editor.set_file("main.zs")
+digest = schema_index.digest("main.zs")
+
+# nothing is written without changes
+render("package main;\n")
+assert not flushed
+
+# the first edit is written immediately, next edits at most once per FLUSH_INTERVAL
+render("package main;\n\nstruct A { uint8 a; };\n")
+assert flushed == ["package main;\n\nstruct A { uint8 a; };\n"]
+assert read("main.zs") == "package main;\n\nstruct A { uint8 a; };\n"
+digest_a = schema_index.digest("main.zs")
+assert digest_a != digest
+
+render("package main;\n\nstruct B { uint8 b; };\n")
+assert len(flushed) == 1
+assert read("main.zs") == "package main;\n\nstruct A { uint8 a; };\n"
+# the schema index sees the edit before it's written
+digest_b = schema_index.digest("main.zs")
+assert digest_b not in (digest, digest_a)
+
+schema_editor.flush()
+assert flushed[-1] == "package main;\n\nstruct B { uint8 b; };\n"
+assert read("main.zs") == "package main;\n\nstruct B { uint8 b; };\n"
+assert schema_index.digest("main.zs") == digest_b
+
+# the write is atomic and keeps the file mode
+assert os.listdir(zs_dir) == ["main.zs"]
+assert os.stat(os.path.join(zs_dir, "main.zs")).st_mode & 0o777 == 0o640
+
+# edits of a file replaced meanwhile (e.g. by an upload) are dropped
+render("package main;\n\nstruct C { uint8 c; };\n")
+with open(os.path.join(zs_dir, "main.zs"), "w") as f:
+    f.write("package main;\n\nstruct Uploaded { uint8 u; };\n")
+schema_editor.flush()
+assert read("main.zs") == "package main;\n\nstruct Uploaded { uint8 u; };\n"
+
+# the replaced file is read again
+render("package main;\n\nstruct Uploaded { uint8 u; };\n")
+assert schema_editor.content == "package main;\n\nstruct Uploaded { uint8 u; };\n"
+assert flushed[-1] == "package main;\n\nstruct B { uint8 b; };\n"
+
+# the buffers can be flushed outside of the script run, e.g. before the idle workspace is evicted
+render("package main;\n\nstruct D { uint8 d; };\n")
+render("package main;\n\nstruct E { uint8 e; };\n")
+assert read("main.zs") == "package main;\n\nstruct D { uint8 d; };\n"
+flush_thread = threading.Thread(target=schema_editor.flusher())
+flush_thread.start()
+flush_thread.join()
+assert read("main.zs") == "package main;\n\nstruct E { uint8 e; };\n"
@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+
+from interactive_zserio.file_index import FileIndex
+
+def write(path):
+    os.makedirs(os.path.dirname(os.path.join(folder, path)), exist_ok=True)
+    with open(os.path.join(folder, path), "w") as f:
+        f.write("package x;\n")
+
+def set_mtime(rel_dir, mtime_ns):
+    os.utime(os.path.join(folder, rel_dir), ns=(mtime_ns, mtime_ns))
+
+def touch_dir(rel_dir):
+    # mtime granularity of the file system can be coarse
+    set_mtime(rel_dir, os.stat(os.path.join(folder, rel_dir)).st_mtime_ns + 1000000000)
+
+tmp_dir = tempfile.TemporaryDirectory()
+folder = tmp_dir.name
+
+write("main.zs")
+write("a/b.zs")
+write("a/c/d.zs")
+write("a/readme.txt")
+
+file_index = FileIndex(folder, "zs")
+assert file_index.files() == ["a/b.zs", "a/c/d.zs", "main.zs"], file_index.files()
+
+# new files and directories are seen through mtime of the directories
+write("a/e.zs")
+write("f/g.zs")
+touch_dir("a")
+touch_dir("")
+assert file_index.files() == ["a/b.zs", "a/c/d.zs", "a/e.zs", "f/g.zs", "main.zs"], file_index.files()
+
+# unchanged directories are not listed again
+listed = file_index._dirs["a/c"]
+assert file_index.files() == ["a/b.zs", "a/c/d.zs", "a/e.zs", "f/g.zs", "main.zs"]
+assert file_index._dirs["a/c"] is listed
+
+# a change which keeps mtime of the directory is seen only when reported
+mtime_ns = os.stat(os.path.join(folder, "a/c")).st_mtime_ns
+write("a/c/h.zs")
+set_mtime("a/c", mtime_ns)
+assert "a/c/h.zs" not in file_index.files()
+file_index.changed("a/c/h.zs")
+assert "a/c/h.zs" in file_index.files()
+
+# removed directories are forgotten including their sub-directories
+shutil.rmtree(os.path.join(folder, "a"))
+touch_dir("")
+assert file_index.files() == ["f/g.zs", "main.zs"], file_index.files()
+assert not any(rel_dir.startswith("a") for rel_dir in file_index._dirs)
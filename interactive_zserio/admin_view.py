@@ -0,0 +1,46 @@
+import os
+import streamlit as st
+
+from interactive_zserio.widget import Widget
+from interactive_zserio.metrics_server import collect
+
+class AdminView(Widget):
+    def __init__(self):
+        super().__init__("admin_view")
+
+    @staticmethod
+    def requested(query_params):
+        # hidden page, available only when the token is configured
+        return bool(ADMIN_TOKEN) and query_params.get("admin", [None])[0] == ADMIN_TOKEN
+
+    def render(self):
+        self._log("render")
+        stats = collect()
+
+        st.header("Server")
+        cols = st.columns(3)
+        with cols[0]:
+            st.caption("Scheduler")
+            st.json(stats["scheduler"])
+        with cols[1]:
+            st.caption("Compile cache")
+            st.json(stats["compile_cache"])
+        with cols[2]:
+            st.caption("Sessions")
+            st.json({key: value for key, value in stats["sessions"].items() if key != "per_session"})
+
+        st.caption("Timings [s]")
+        self._display_metrics(stats["metrics"])
+
+        st.header("Sessions")
+        st.dataframe(stats["sessions"]["per_session"], use_container_width=True)
+        session_ids = sorted(stats["session_metrics"])
+        session_id = st.selectbox("Session", session_ids, key=self._key("session"))
+        if session_id is not None:
+            self._display_metrics(stats["session_metrics"][session_id])
+
+    def _display_metrics(self, metrics):
+        st.dataframe([dict(name=name, **histogram) for name, histogram in metrics.items()],
+                     use_container_width=True)
+
+ADMIN_TOKEN=os.getenv("INTERACTIVE_ZSERIO_ADMIN_TOKEN")
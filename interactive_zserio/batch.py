@@ -0,0 +1,180 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from zipfile import ZipFile, BadZipFile
+
+from interactive_zserio.compile_service import CompileService, GENERATORS
+from interactive_zserio.zip_extractor import ZipExtractor, ZipLimitError
+
+def compile_input(input_path, output_dir, generators, extra_args, main_file=None):
+    # compiles a single workspace (directory or zip), runs in a worker process of the batch
+    start = time.perf_counter()
+    summary = {"input": input_path, "output": output_dir, "main_file": None, "status": "failed",
+               "generators": {}, "diagnostics": []}
+    try:
+        with tempfile.TemporaryDirectory(prefix="interactive_zserio_batch_") as tmp_dir:
+            zs_dir = _prepare(input_path, tmp_dir)
+            zs_files = _list_zs_files(zs_dir)
+            if not zs_files:
+                raise ValueError("No *.zs files found")
+            zs_file_path = main_file if main_file is not None else zs_files[0]
+            if zs_file_path not in zs_files:
+                raise ValueError(f"Schema file '{zs_file_path}' not found")
+            summary["main_file"] = zs_file_path
+
+            if output_dir is None:
+                output_dir = os.path.join(tmp_dir, "gen")
+            results = CompileService(zs_dir, output_dir).compile(zs_file_path, extra_args, generators)
+    except (OSError, ValueError, ZipLimitError, BadZipFile) as e:
+        summary.update(status="error", error=str(e), elapsed=time.perf_counter() - start)
+        return summary
+    except Exception as e:
+        # a single broken input must not stop the batch
+        summary.update(status="error", error=f"{type(e).__name__}: {e}", elapsed=time.perf_counter() - start)
+        return summary
+
+    for result in results:
+        summary["generators"][result.generator] = {
+            "returncode": result.completed_process.returncode,
+            "elapsed": result.elapsed,
+            "source": result.source
+        }
+        # all generators share the same schema, thus report each message only once
+        for line in (result.completed_process.stderr or "").splitlines():
+            # paths relative to the schema directory instead of the temporary directory of the batch
+            line = line.replace(os.path.join(zs_dir, ""), "")
+            if line.strip() and line not in summary["diagnostics"]:
+                summary["diagnostics"].append(line)
+    summary["status"] = "ok" if all(result.success for result in results) else "failed"
+    summary["elapsed"] = time.perf_counter() - start
+    return summary
+
+def run_batch(inputs, output_dir, generators, extra_args, main_file=None, jobs=None):
+    output_dirs = _output_dirs(inputs, output_dir) if output_dir is not None else [None] * len(inputs)
+    jobs = min(jobs or os.cpu_count() or 1, len(inputs)) or 1
+
+    # each worker process keeps its own warm compiler, one is enough as the process compiles one input at a time
+    os.environ.setdefault("INTERACTIVE_ZSERIO_COMPILER_WORKERS", "1")
+
+    start = time.perf_counter()
+    summaries = [None] * len(inputs)
+    with ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = {executor.submit(compile_input, input_path, input_output_dir, generators, extra_args,
+                                   main_file): i
+                   for i, (input_path, input_output_dir) in enumerate(zip(inputs, output_dirs))}
+        for future in as_completed(futures):
+            try:
+                summary = future.result()
+            except Exception as e:
+                # e.g. the worker process died
+                summary = {"input": inputs[futures[future]], "output": output_dirs[futures[future]],
+                           "main_file": None, "status": "error", "generators": {}, "diagnostics": [],
+                           "error": f"{type(e).__name__}: {e}", "elapsed": time.perf_counter() - start}
+            summaries[futures[future]] = summary
+            print(f"{summary['status']:<7} {summary['elapsed']:7.2f}s {summary['input']}", file=sys.stderr)
+
+    return {
+        "generators": generators,
+        "extra_args": extra_args,
+        "jobs": jobs,
+        "elapsed": time.perf_counter() - start,
+        "ok": sum(1 for summary in summaries if summary["status"] == "ok"),
+        "failed": sum(1 for summary in summaries if summary["status"] != "ok"),
+        "inputs": summaries
+    }
+
+def _prepare(input_path, tmp_dir):
+    # returns the directory with the schema files
+    if os.path.isdir(input_path):
+        # either a workspace (e.g. an extracted workspace zip) or a directory with the schema
+        zs_dir = os.path.join(input_path, WORKSPACE_ZS_FOLDER)
+        return zs_dir if os.path.isdir(zs_dir) else input_path
+
+    if not input_path.endswith(".zip"):
+        raise ValueError("Input must be a directory or a *.zip file")
+
+    zs_dir = os.path.join(tmp_dir, WORKSPACE_ZS_FOLDER)
+    with ZipFile(input_path, "r") as zip_file:
+        extractor = ZipExtractor(zip_file)
+        names = [info.filename for info in zip_file.infolist() if not info.is_dir()]
+        # workspace zips downloaded from the app contain the workspace folder
+        prefix = WORKSPACE_FOLDER + "/" + WORKSPACE_ZS_FOLDER + "/"
+        if names and all(name.startswith(WORKSPACE_FOLDER + "/") for name in names):
+            members = extractor.select(lambda name: name.startswith(prefix) and name.endswith(".zs"))
+            rename = lambda name: name[len(prefix):]
+        else:
+            members = extractor.select(lambda name: name.endswith(".zs"))
+            rename = lambda name: name
+        for path, chunks in extractor.extract(members, rename):
+            full_path = os.path.join(zs_dir, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+    return zs_dir
+
+def _list_zs_files(zs_dir):
+    # sorted as in the file chooser of the app, thus the default main file is the same
+    zs_files = []
+    for root, _, files in os.walk(zs_dir):
+        zs_files += [os.path.relpath(os.path.join(root, name), zs_dir) for name in files if name.endswith(".zs")]
+    return sorted(zs_files)
+
+def _output_dirs(inputs, output_dir):
+    output_dirs = []
+    used = set()
+    for input_path in inputs:
+        name = os.path.basename(os.path.normpath(input_path)).removesuffix(".zip")
+        unique_name = name
+        i = 1
+        while unique_name in used:
+            unique_name = f"{name}_{i}"
+            i += 1
+        used.add(unique_name)
+        output_dirs.append(os.path.join(output_dir, unique_name))
+    return output_dirs
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m interactive_zserio.batch",
+                                     description="Compiles many workspaces or zips using the app's generators.")
+    parser.add_argument("inputs", nargs="+", help="workspace or schema directories and *.zip files")
+    parser.add_argument("-g", "--generator", action="append", choices=GENERATORS, dest="generators",
+                        help="generator to use, can be repeated (python by default)")
+    parser.add_argument("-e", "--extra-args", default="", help="extra arguments passed to the zserio compiler")
+    parser.add_argument("-m", "--main-file",
+                        help="schema file to compile relative to the schema directory (first file by default)")
+    parser.add_argument("-o", "--output", default=OUTPUT_DIR, help="directory for the generated sources")
+    parser.add_argument("--validate-only", action="store_true",
+                        help="don't keep the generated sources, e.g. to validate the schemas or to warm the cache")
+    parser.add_argument("-j", "--jobs", type=int, help="number of worker processes (number of CPUs by default)")
+    parser.add_argument("-s", "--summary", help=f"JSON summary file (<output>/{SUMMARY_FILE_NAME} by default)")
+    args = parser.parse_args(argv)
+
+    generators = [generator for generator in GENERATORS if generator in (args.generators or ["python"])]
+    output_dir = None if args.validate_only else args.output
+    summary = run_batch(args.inputs, output_dir, generators, args.extra_args, args.main_file, args.jobs)
+
+    summary_path = args.summary
+    if summary_path is None:
+        summary_path = os.path.join(args.output, SUMMARY_FILE_NAME)
+    os.makedirs(os.path.dirname(os.path.abspath(summary_path)), exist_ok=True)
+    with open(summary_path, "w") as summary_file:
+        json.dump(summary, summary_file, indent=2)
+    print(f"{summary['ok']} ok, {summary['failed']} failed in {summary['elapsed']:.2f}s, summary: {summary_path}",
+          file=sys.stderr)
+
+    return 0 if summary["failed"] == 0 else 1
+
+OUTPUT_DIR="batch_output"
+SUMMARY_FILE_NAME="summary.json"
+WORKSPACE_FOLDER="workspace"
+WORKSPACE_ZS_FOLDER="zs"
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,318 @@
+import json
+import os
+import select
+import signal
+import streamlit as st
+import subprocess
+import sys
+import time
+import weakref
+
+from interactive_zserio.widget import Widget, timed
+from interactive_zserio.uploader import Uploader
+from interactive_zserio.python_pool import SANDBOX_ENV, set_limits
+from interactive_zserio.metrics import Metrics
+
+class InspectorError(Exception):
+    pass
+
+class InspectorProcess:
+    # long-lived sandboxed process which keeps the decoded data, killing it cancels the decoding
+    def __init__(self, cwd, memory_limit):
+        self._process = subprocess.Popen([sys.executable, "-c", _get_sandbox_code()], cwd=cwd, env=SANDBOX_ENV,
+                                         stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=subprocess.DEVNULL, start_new_session=True,
+                                         preexec_fn=lambda: set_limits(CPU_LIMIT, memory_limit))
+        self.memory_limit = memory_limit
+        # the process is killed also when the session state is dropped
+        self._finalizer = weakref.finalize(self, _kill, self._process)
+        self.pending = None
+        self.started = None
+
+    @property
+    def alive(self):
+        return self._process.poll() is None
+
+    def send(self, request):
+        try:
+            self._process.stdin.write((json.dumps(request) + "\n").encode())
+            self._process.stdin.flush()
+        except OSError:
+            raise InspectorError("The inspector process is not running.")
+        self.pending = request["command"]
+        self.started = time.monotonic()
+
+    def receive(self, timeout):
+        ready, _, _ = select.select([self._process.stdout], [], [], timeout)
+        if not ready:
+            return None
+        line = self._process.stdout.readline()
+        self.pending = None
+        if not line:
+            raise InspectorError("The inspector process has been terminated, probably by the memory or CPU limit.")
+        response = json.loads(line)
+        if "error" in response:
+            raise InspectorError(response["error"])
+        return response
+
+    def call(self, request):
+        self.send(request)
+        response = self.receive(CALL_TIMEOUT)
+        if response is None:
+            self.kill()
+            raise InspectorError("The inspector process doesn't respond.")
+        return response
+
+    def kill(self):
+        self._finalizer()
+
+class BlobInspector(Widget):
+    def __init__(self, blob_dir, python_gen_dir):
+        super().__init__("blob_inspector")
+        self._blob_dir = blob_dir
+        self._python_gen_dir = python_gen_dir
+
+        self._python_generated = None
+        self._python_digest = None
+
+    def set_python_generated(self, python_generated, python_digest=None):
+        self._python_generated = python_generated
+        self._python_digest = python_digest
+
+    @property
+    def decoding(self):
+        return self._pending_process() is not None
+
+    @timed
+    def render(self):
+        self._log("render")
+
+        st.checkbox("Inspect binary data", key=self._key("check"), disabled=(not self._python_generated),
+                    help="Decodes a serialized blob using the generated python API, "
+                         "python generator must be enabled")
+        if not st.session_state[self._key("check")] or not self._python_generated:
+            self._close()
+            return
+
+        message = st.session_state.pop(self._key("message"), None)
+        if message is not None:
+            getattr(st, message[0])(message[1])
+
+        blob_path = self._intake()
+        if blob_path is None:
+            return
+
+        try:
+            stat = os.stat(blob_path)
+            # the blob is mapped into the address space of the process, thus it counts to the limit
+            process = self._get_process(INSPECTOR_MEMORY_LIMIT + stat.st_size)
+            types = self._list_types(process)
+            if not types:
+                st.info("No structure or union without parameters found in the schema.")
+                return
+
+            names = [compound_type["name"] for compound_type in types]
+            name = st.selectbox("Type", names, key=self._key("type"))
+            compound_type = types[names.index(name)]
+            decode_key = (blob_path, stat.st_mtime_ns, stat.st_size, self._python_digest, name)
+
+            if process.pending == "open":
+                # the decoding is polled by render_decoding
+                if not self._receive_decoded(process, 0):
+                    return
+            elif st.session_state.get(self._key("decoded")) != decode_key:
+                if not st.button("Decode", key=self._key("decode"),
+                                 help="The file is decoded as a whole, the decoding can be cancelled."):
+                    return
+                process.send({"command": "open", "path": blob_path, "module": compound_type["module"],
+                              "class": compound_type["class"]})
+                st.session_state[self._key("decoding")] = decode_key
+                if not self._receive_decoded(process, DECODE_WAIT):
+                    # the script isn't blocked by a long decoding, the whole script is rerun to start the polling
+                    st.experimental_rerun()
+
+            if st.session_state.get(self._key("decoded")) == decode_key:
+                self._render_tree(process)
+        except InspectorError as e:
+            self._close()
+            st.error(str(e))
+
+    def _intake(self):
+        source = "upload"
+        if BLOB_DIR:
+            source = st.radio("Binary data", ["upload", "server"], key=self._key("source"), horizontal=True,
+                              format_func=lambda x: "Upload" if x == "upload" else "Server files")
+
+        if source == "upload":
+            uploaded_blob = st.file_uploader("Upload binary data", type=["bin"], key=self._key("uploaded_blob"))
+            if not uploaded_blob:
+                return None
+            blob_path = os.path.join(self._blob_dir, UPLOADED_BLOB_NAME)
+            uploaded_key = (uploaded_blob.name, uploaded_blob.size)
+            if st.session_state.get(self._key("uploaded_key")) != uploaded_key or not os.path.exists(blob_path):
+                self._log("saving uploaded blob:", uploaded_blob.name, uploaded_blob.size)
+                Uploader.save(uploaded_blob, blob_path)
+                st.session_state[self._key("uploaded_key")] = uploaded_key
+            return blob_path
+
+        blobs = _list_server_blobs()
+        if not blobs:
+            st.info("No *.bin files found on the server.")
+            return None
+        blob = st.selectbox("Server file", blobs, key=self._key("server_blob"))
+        blob_path = os.path.realpath(os.path.join(BLOB_DIR, blob))
+        if not blob_path.startswith(os.path.realpath(BLOB_DIR) + os.sep) or not os.path.isfile(blob_path):
+            return None
+        return blob_path
+
+    def _get_process(self, memory_limit):
+        process_state = st.session_state.get(self._key("process"))
+        if process_state is not None:
+            digest, process = process_state
+            if digest == self._python_digest and process.alive and process.memory_limit >= memory_limit:
+                return process
+            process.kill()
+
+        self._log("starting inspector process, memory limit:", memory_limit)
+        self._reset_decoded()
+        process = InspectorProcess(self._python_gen_dir, memory_limit)
+        st.session_state[self._key("process")] = (self._python_digest, process)
+        return process
+
+    def _list_types(self, process):
+        types = st.session_state.get(self._key("types"))
+        if types is not None and types[0] == self._python_digest:
+            return types[1]
+
+        types = process.call({"command": "list"})["types"]
+        st.session_state[self._key("types")] = (self._python_digest, types)
+        return types
+
+    def render_decoding(self):
+        # rendered periodically by a fragment of the main view while decoding, the whole script is rerun to drop it
+        process = self._pending_process()
+        if process is None:
+            st.experimental_rerun()
+
+        try:
+            if st.button("Cancel decoding", key=self._key("cancel")):
+                self._log("decoding cancelled")
+                self._close()
+                st.session_state[self._key("message")] = ("info", "Decoding cancelled.")
+                st.experimental_rerun()
+            if self._receive_decoded(process, JOB_POLL_INTERVAL):
+                st.experimental_rerun()
+        except InspectorError as e:
+            self._close()
+            st.session_state[self._key("message")] = ("error", str(e))
+            st.experimental_rerun()
+        st.info(f"Decoding... {time.monotonic() - process.started:.1f}s")
+
+    def _pending_process(self):
+        process_state = st.session_state.get(self._key("process"))
+        if process_state is None or process_state[1].pending != "open":
+            return None
+        return process_state[1]
+
+    def _receive_decoded(self, process, timeout):
+        response = process.receive(timeout)
+        if response is None:
+            return False
+
+        Metrics.instance().observe(self.name + ".decode", response["elapsed"], self._session_id)
+        st.session_state[self._key("decoded")] = st.session_state.pop(self._key("decoding"), None)
+        st.session_state[self._key("decode_result")] = response
+        st.session_state[self._key("path")] = []
+        return True
+
+    def _render_tree(self, process):
+        result = st.session_state[self._key("decode_result")]
+        st.caption(f"Decoded {result['bits_read'] / 8:,.0f} of {result['bits_total'] / 8:,.0f} bytes "
+                   f"in {result['elapsed']:.2f}s")
+        if result["bits_total"] - result["bits_read"] >= 8:
+            st.warning("The data contain trailing bytes which were not decoded.")
+
+        path = st.session_state.setdefault(self._key("path"), [])
+        page_key = self._key("page_" + _format_path(path))
+        page = st.session_state.get(page_key, 1)
+
+        cols = st.columns([1, 7])
+        cols[0].button("⬆ Up", key=self._key("up"), disabled=not path, on_click=self._up)
+        node = process.call({"command": "expand", "path": path, "offset": (page - 1) * PAGE_SIZE,
+                             "limit": PAGE_SIZE})
+        cols[1].caption(f"{_format_path(path)}: {node['type']}" +
+                        (f" ({node['total']} elements)" if node["kind"] == "array" else ""))
+
+        if node["total"] > PAGE_SIZE:
+            pages = (node["total"] + PAGE_SIZE - 1) // PAGE_SIZE
+            st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key=page_key)
+
+        expandable = {child["name"]: child["key"] for child in node["children"] if child["expandable"]}
+        if expandable:
+            st.selectbox("Open", [None] + list(expandable), key=self._key("open"), on_change=self._open,
+                         args=(expandable,), format_func=lambda x: "Choose a field or an element..." if x is None else x)
+        st.table([{"name": child["name"], "type": child["type"], "value": child["value"]}
+                  for child in node["children"]])
+
+    def _open(self, expandable):
+        # the tree is expanded lazily, only the opened node is read from the inspector process
+        selected = st.session_state[self._key("open")]
+        if selected is not None:
+            st.session_state[self._key("path")].append(expandable[selected])
+        st.session_state[self._key("open")] = None
+
+    def _up(self):
+        st.session_state[self._key("path")].pop()
+
+    def _reset_decoded(self):
+        for key in ("decoded", "decoding", "decode_result", "types"):
+            st.session_state.pop(self._key(key), None)
+
+    def _close(self):
+        process_state = st.session_state.pop(self._key("process"), None)
+        if process_state is not None:
+            process_state[1].kill()
+        self._reset_decoded()
+
+def _list_server_blobs():
+    blobs = []
+    for root, dirs, files in os.walk(BLOB_DIR):
+        dirs.sort()
+        blobs += [os.path.relpath(os.path.join(root, name), BLOB_DIR) for name in sorted(files) if name.endswith(".bin")]
+        if len(blobs) >= MAX_SERVER_BLOBS:
+            break
+    return blobs[:MAX_SERVER_BLOBS]
+
+def _format_path(path):
+    return "root" + "".join(f"[{key}]" if isinstance(key, int) else f".{key}" for key in path)
+
+def _get_sandbox_code():
+    global _sandbox_code
+    if _sandbox_code is None:
+        _sandbox_code = ""
+        for name in ("sandbox_types.py", "blob_sandbox.py"):
+            with open(os.path.join(os.path.dirname(__file__), name)) as f:
+                _sandbox_code += f.read() + "\n"
+    return _sandbox_code
+
+def _kill(process):
+    if process.poll() is None:
+        try:
+            # kill also everything the process could spawn
+            os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        process.wait()
+
+BLOB_DIR=os.getenv("INTERACTIVE_ZSERIO_BLOB_DIR")
+UPLOADED_BLOB_NAME="uploaded.bin"
+MAX_SERVER_BLOBS=1000
+PAGE_SIZE=100
+CPU_LIMIT=300
+INSPECTOR_MEMORY_LIMIT=int(os.getenv("INTERACTIVE_ZSERIO_INSPECTOR_MEMORY_MB", "4096")) * 1024 * 1024
+CALL_TIMEOUT=30
+JOB_POLL_INTERVAL=0.1
+DECODE_WAIT=1
+DECODE_POLL_INTERVAL=0.5
+
+_sandbox_code = None
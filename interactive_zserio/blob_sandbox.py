@@ -0,0 +1,115 @@
+# executed as a long-lived sandboxed process with the generated python sources as the working directory,
+# thus it can use only the standard library and the zserio runtime, requests and responses are JSON lines,
+# list_compounds and is_compound_type are defined by the caller in front of this code (sandbox_types.py)
+import importlib
+import inspect
+import json
+import mmap
+import os
+import select
+import sys
+import time
+import zserio
+
+class Inspector:
+    def __init__(self):
+        self._root = None
+
+    def handle(self, request):
+        command = request["command"]
+        if command == "list":
+            return {"types": list_compounds()}
+        if command == "open":
+            return self._open(request["path"], request["module"], request["class"])
+        if command == "expand":
+            return self._expand(request["path"], request["offset"], request["limit"])
+        raise ValueError(f"unknown command '{command}'")
+
+    def _open(self, path, module_name, class_name):
+        self._root = None
+        py_type = getattr(importlib.import_module(module_name), class_name)
+        start = time.perf_counter()
+        with open(path, "rb") as blob:
+            if os.fstat(blob.fileno()).st_size == 0:
+                raise ValueError("the file is empty")
+            # the decoder reads through the page cache, the file is never copied to the memory as a whole
+            with mmap.mmap(blob.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                reader = zserio.BitStreamReader(buffer)
+                self._root = py_type.from_reader(reader)
+                bits_read = reader.bitposition
+                bits_total = len(buffer) * 8
+        return {"elapsed": time.perf_counter() - start, "bits_read": bits_read, "bits_total": bits_total}
+
+    def _expand(self, path, offset, limit):
+        if self._root is None:
+            raise ValueError("nothing is decoded")
+        node = self._root
+        for key in path:
+            node = node[key] if isinstance(node, list) else getattr(node, key)
+
+        if isinstance(node, list):
+            children = [_describe(f"[{index}]", index, node[index])
+                        for index in range(offset, min(offset + limit, len(node)))]
+            return {"kind": "array", "type": _type_name(node), "total": len(node), "children": children}
+
+        children = [_describe(name, name, getattr(node, name)) for name in _fields(node)]
+        return {"kind": "compound", "type": _type_name(node), "total": len(children), "children": children}
+
+def _fields(node):
+    parameters = list(inspect.signature(type(node).__init__).parameters.values())[1:]
+    if not hasattr(node, "choice_tag"):
+        return [parameter.name.removesuffix("_") for parameter in parameters]
+
+    # parameters don't have default values, only the selected field of choices and unions is shown
+    selected = [name.removeprefix("CHOICE_").lower() for name in dir(type(node))
+                if name.startswith("CHOICE_") and getattr(type(node), name) == node.choice_tag]
+    return [parameter.name.removesuffix("_") for parameter in parameters
+            if parameter.default is inspect.Parameter.empty] + selected
+
+def _describe(name, key, value):
+    child = {"name": name, "key": key, "type": _type_name(value), "expandable": False}
+    if isinstance(value, list):
+        child["value"] = f"{len(value)} elements"
+        child["expandable"] = len(value) > 0
+    elif is_compound_type(type(value)):
+        child["value"] = ""
+        child["expandable"] = True
+    elif isinstance(value, zserio.BitBuffer):
+        child["value"] = f"{value.bitsize} bits: {value.buffer[:MAX_BYTES_PREVIEW].hex(' ')}"
+    elif isinstance(value, (bytes, bytearray)):
+        child["value"] = f"{len(value)} bytes: {bytes(value[:MAX_BYTES_PREVIEW]).hex(' ')}"
+    elif isinstance(value, str):
+        child["value"] = repr(value[:MAX_STRING_PREVIEW]) + ("..." if len(value) > MAX_STRING_PREVIEW else "")
+    else:
+        child["value"] = str(value)
+    return child
+
+def _type_name(value):
+    if isinstance(value, list):
+        return (_type_name(value[0]) + "[]") if value else "[]"
+    return type(value).__name__
+
+def main():
+    inspector = Inspector()
+    while True:
+        ready, _, _ = select.select([sys.stdin], [], [], IDLE_TIMEOUT)
+        if not ready:
+            # nobody uses the decoded data anymore
+            return
+        line = sys.stdin.readline()
+        if not line:
+            return
+        request = json.loads(line)
+        try:
+            response = inspector.handle(request)
+        except Exception as e:
+            response = {"error": f"{type(e).__name__}: {e}"}
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+IDLE_TIMEOUT=600
+MAX_BYTES_PREVIEW=16
+MAX_STRING_PREVIEW=200
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import shutil
+import stat
+import subprocess
+import tempfile
+import threading
+
+from collections import OrderedDict
+from importlib.metadata import version
+
+from interactive_zserio.logger import Logger
+
+class CompileCache:
+    def __init__(self, cache_dir, max_size):
+        self._cache_dir = cache_dir
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._total_size = 0
+        self._hits = 0
+        self._misses = 0
+
+        os.makedirs(self._cache_dir, exist_ok=True)
+        self._scan()
+
+    @staticmethod
+    def instance():
+        global _compile_cache
+        with _compile_cache_lock:
+            if _compile_cache is None:
+                _compile_cache = CompileCache(CACHE_DIR, CACHE_SIZE)
+            return _compile_cache
+
+    @staticmethod
+    def make_key(schema_digest, zs_file_path, extra_args, generator):
+        params = {
+            "zserio_version": version("zserio"),
+            "schema_digest": schema_digest,
+            "zs_file_path": zs_file_path,
+            "extra_args": extra_args.split() if extra_args else [],
+            "generator": generator
+        }
+
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+    @property
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "entries": len(self._entries),
+                "size": self._total_size
+            }
+
+    def restore(self, key, output_dir):
+        entry_dir = os.path.join(self._cache_dir, key)
+        with self._lock:
+            if key not in self._entries:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+
+        try:
+            os.utime(entry_dir)
+            with open(os.path.join(entry_dir, RESULT_FILE_NAME), "r") as result_file:
+                result = json.load(result_file)
+            shutil.copytree(os.path.join(entry_dir, OUTPUT_DIR_NAME), output_dir, copy_function=_link_or_copy,
+                            dirs_exist_ok=True)
+        except OSError as e:
+            # the entry could be evicted meanwhile by another server process
+            Logger.warning("compile_cache:", "failed to restore entry:", key, e)
+            shutil.rmtree(output_dir, ignore_errors=True)
+            with self._lock:
+                self._misses += 1
+                self._forget(key)
+            return None
+
+        with self._lock:
+            self._hits += 1
+        self._log("hit:", key)
+
+        return subprocess.CompletedProcess(result["args"], 0, result["stdout"], result["stderr"])
+
+    def store(self, key, output_dir, completed_process):
+        entry_dir = os.path.join(self._cache_dir, key)
+        tmp_dir = tempfile.mkdtemp(prefix=TMP_PREFIX, dir=self._cache_dir)
+        try:
+            shutil.copytree(output_dir, os.path.join(tmp_dir, OUTPUT_DIR_NAME), copy_function=_link_or_copy)
+            with open(os.path.join(tmp_dir, RESULT_FILE_NAME), "w") as result_file:
+                json.dump({"args": completed_process.args, "stdout": completed_process.stdout,
+                           "stderr": completed_process.stderr}, result_file)
+            _make_read_only(os.path.join(tmp_dir, OUTPUT_DIR_NAME))
+            size = _dir_size(tmp_dir)
+            os.rename(tmp_dir, entry_dir)
+        except OSError as e:
+            # the same entry could be stored meanwhile by another server process
+            Logger.warning("compile_cache:", "failed to store entry:", key, e)
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not os.path.isdir(entry_dir):
+                return
+            size = _dir_size(entry_dir)
+
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = size
+            self._total_size += size
+            self._evict()
+        self._log("stored:", key, size)
+
+    def _scan(self):
+        entries = []
+        for entry in os.scandir(self._cache_dir):
+            if entry.name.startswith(TMP_PREFIX):
+                shutil.rmtree(entry.path, ignore_errors=True)
+            elif entry.is_dir():
+                entries.append((entry.stat().st_mtime, entry.name, _dir_size(entry.path)))
+
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._total_size += size
+        self._evict()
+
+    def _evict(self):
+        while self._total_size > self._max_size and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_size -= size
+            self._log("evicting:", key, size)
+            shutil.rmtree(os.path.join(self._cache_dir, key), ignore_errors=True)
+
+    def _forget(self, key):
+        if key in self._entries:
+            self._total_size -= self._entries.pop(key)
+
+    def _log(self, *args):
+        Logger.log("compile_cache:", *args)
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+def _make_read_only(path):
+    # files are hardlinked to the workspaces, make sure that nobody modifies the cached content
+    for root, _, files in os.walk(path):
+        for name in files:
+            os.chmod(os.path.join(root, name), stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+
+def _dir_size(path):
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            size += os.path.getsize(os.path.join(root, name))
+    return size
+
+CACHE_DIR=os.getenv("INTERACTIVE_ZSERIO_CACHE_DIR",
+                    os.path.join(tempfile.gettempdir(), "interactive_zserio_cache"))
+CACHE_SIZE=int(os.getenv("INTERACTIVE_ZSERIO_CACHE_SIZE_MB", "512")) * 1024 * 1024
+OUTPUT_DIR_NAME="output"
+RESULT_FILE_NAME="result.json"
+TMP_PREFIX=".tmp_"
+
+_compile_cache = None
+_compile_cache_lock = threading.Lock()
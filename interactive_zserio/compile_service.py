@@ -0,0 +1,161 @@
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+import weakref
+
+from interactive_zserio.logger import Logger
+from interactive_zserio.metrics import Metrics
+from interactive_zserio.compiler_pool import CompilerPool
+from interactive_zserio.compile_cache import CompileCache
+from interactive_zserio.schema_index import SchemaIndex
+
+class CompileResult:
+    def __init__(self, generator, completed_process, elapsed, source, output_dir=None):
+        self.generator = generator
+        self.completed_process = completed_process
+        self.elapsed = elapsed
+        self.source = source
+        self.output_dir = output_dir
+
+    @property
+    def success(self):
+        return self.completed_process.returncode == 0
+
+class CompileService:
+    # compile pipeline shared by the UI and the batch jobs, doesn't depend on streamlit
+    def __init__(self, zs_dir, gen_dir, schema_index=None):
+        self._zs_dir = zs_dir
+        self._gen_dir = gen_dir
+        self._schema_index = schema_index if schema_index is not None else SchemaIndex(zs_dir)
+
+    def digest(self, zs_file_path):
+        return self._schema_index.digest(zs_file_path)
+
+    def compile(self, zs_file_path, extra_args, generators, schema_digest=None, *, submit=None, wait=None):
+        # submit(key, func, *args) returns a job (e.g. of the Scheduler), the compilation runs inline without it
+        if schema_digest is None:
+            schema_digest = self.digest(zs_file_path)
+        compile_cache = CompileCache.instance()
+
+        results = []
+        jobs = []
+        sources = None
+        start = time.perf_counter()
+        for generator in generators:
+            output_dir = os.path.join(self._gen_dir, generator)
+            shutil.rmtree(output_dir, ignore_errors=True)
+            cache_key = CompileCache.make_key(schema_digest, zs_file_path, extra_args, generator)
+            completed_process = compile_cache.restore(cache_key, output_dir)
+            if completed_process is not None:
+                results.append(CompileResult(generator, self._workspace_paths(completed_process),
+                                             time.perf_counter() - start, "cached"))
+                continue
+
+            if sources is None:
+                sources = self._read_sources(zs_file_path)
+            args = (sources, zs_file_path, extra_args, generator, cache_key)
+            if submit is not None:
+                jobs.append(submit(cache_key, _compile_to_cache, *args))
+            else:
+                jobs.append(_CompletedJob(cache_key, _compile_to_cache(*args)))
+
+        if wait is not None:
+            wait(jobs)
+        for job in jobs:
+            result = job.result()
+            output_dir = os.path.join(self._gen_dir, result.generator)
+            completed_process = self._workspace_paths(result.completed_process)
+            if result.success:
+                if compile_cache.restore(job.key, output_dir) is None:
+                    # the entry didn't make it to the cache, take the output which is kept by the job
+                    shutil.copytree(result.output_dir, output_dir, dirs_exist_ok=True)
+            elif self._misses_files(completed_process):
+                # the job got only the import closure found by the schema index, compile the whole workspace
+                results.append(_compile(self._zs_dir, zs_file_path, extra_args, result.generator, output_dir))
+                continue
+            results.append(CompileResult(result.generator, completed_process, result.elapsed, result.source))
+
+        return results
+
+    def _workspace_paths(self, completed_process):
+        # diagnostics of the compile jobs refer to the temporary job directory
+        zs_dir_prefix = os.path.join(self._zs_dir, "")
+        return subprocess.CompletedProcess(completed_process.args, completed_process.returncode,
+                                           JOB_DIR_PATTERN.sub(lambda _: zs_dir_prefix, completed_process.stdout or ""),
+                                           JOB_DIR_PATTERN.sub(lambda _: zs_dir_prefix, completed_process.stderr or ""))
+
+    def _misses_files(self, completed_process):
+        return any(os.path.isfile(path) for path in MISSING_FILE_PATTERN.findall(completed_process.stderr))
+
+    def _read_sources(self, zs_file_path):
+        # jobs can be queued for a while, compile exactly the content which has been used for the cache key
+        sources = {}
+        for path, schema_file in self._schema_index.closure(zs_file_path).items():
+            if schema_file is not None:
+                with open(os.path.join(self._zs_dir, path), "rb") as f:
+                    sources[path] = f.read()
+        return sources
+
+class _CompletedJob:
+    def __init__(self, key, result):
+        self.key = key
+        self.position = None
+        self._result = result
+
+    def done(self):
+        return True
+
+    def result(self, timeout=None):
+        return self._result
+
+def _compile(zs_dir, zs_file_path, extra_args, generator, output_dir):
+    start = time.perf_counter()
+
+    args = []
+    args += extra_args.split() if extra_args else []
+    args += ["-src", zs_dir]
+    args.append(zs_file_path)
+    args += ["-" + generator, output_dir]
+
+    Logger.debug("compile_service:", "compile:", args)
+    with Metrics.instance().span("compiler." + generator):
+        completed_process, warm = CompilerPool.instance().run_compiler(args)
+
+    return CompileResult(generator, completed_process, time.perf_counter() - start, "warm" if warm else "cold")
+
+def _compile_to_cache(sources, zs_file_path, extra_args, generator, cache_key):
+    job_dir = tempfile.mkdtemp(prefix=JOB_DIR_PREFIX)
+    try:
+        zs_dir = os.path.join(job_dir, "zs")
+        for path, content in sources.items():
+            os.makedirs(os.path.dirname(os.path.join(zs_dir, path)), exist_ok=True)
+            with open(os.path.join(zs_dir, path), "wb") as f:
+                f.write(content)
+
+        output_dir = os.path.join(job_dir, generator)
+        result = _compile(zs_dir, zs_file_path, extra_args, generator, output_dir)
+        if result.success:
+            CompileCache.instance().store(cache_key, output_dir, result.completed_process)
+    except BaseException:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise
+
+    # the output stays available to all consumers of the job, even when the cache entry is missing,
+    # the cached files are hardlinks, thus it doesn't take any space
+    result.output_dir = output_dir
+    weakref.finalize(result, shutil.rmtree, job_dir, True)
+    return result
+
+JOB_DIR_PREFIX="interactive_zserio_job_"
+JOB_DIR_PATTERN=re.compile(r"[^\s'\"]*" + re.escape(JOB_DIR_PREFIX) + r"[^/\s]*/zs/")
+MISSING_FILE_PATTERN=re.compile(r"^\s*\[ERROR\] (.+): No such file!$", re.MULTILINE)
+GENERATORS=[
+    "python",
+    "cpp",
+    "java",
+    "xml",
+    "doc",
+]
@@ -0,0 +1,95 @@
+import os
+import resource
+import subprocess
+import tempfile
+import threading
+import zserio
+
+from interactive_zserio.worker_pool import Worker, WorkerError, WorkerTimeout, WorkerPool, serve
+from interactive_zserio.metrics import Metrics
+from interactive_zserio.scheduler import Scheduler
+
+class CompilerPool(WorkerPool):
+    def __init__(self, size):
+        super().__init__("compiler_pool", size,
+                         lambda: Worker("interactive_zserio.compiler_pool", start_timeout=WORKER_START_TIMEOUT))
+
+    @staticmethod
+    def instance():
+        global _compiler_pool
+        with _compiler_pool_lock:
+            if _compiler_pool is None:
+                _compiler_pool = CompilerPool(COMPILER_WORKERS)
+            return _compiler_pool
+
+    def run_compiler(self, args):
+        worker = self._acquire(WORKER_JOB_TIMEOUT)
+        if worker is not None:
+            try:
+                response = worker.request({"args": args}, WORKER_JOB_TIMEOUT)
+                self._release(worker)
+                # coalesced compilations are accounted to the submitting session like the worker time,
+                # CPU time of the cold runs isn't known
+                Metrics.instance().observe(CPU_TIME_METRIC, response["cpu_time"], Scheduler.current_session_id())
+                return (subprocess.CompletedProcess(args, response["returncode"], response["stdout"],
+                                                    response["stderr"]),
+                        True)
+            except WorkerTimeout as e:
+                # the compilation is too slow, running it once more cold would only double the wait
+                self._discard(worker, e)
+                return (subprocess.CompletedProcess(args, 1, "",
+                                                    f"Compilation didn't finish within {WORKER_JOB_TIMEOUT}s!\n"),
+                        True)
+            except WorkerError as e:
+                self._discard(worker, e)
+
+        return zserio.run_compiler(args), False
+
+def _start_jvm(channel):
+    import jpype # optional, without it the pool falls back to zserio.run_compiler
+
+    jpype.startJVM(classpath=[zserio.compiler.ZSERIO_JAR_FILE], convertStrings=True)
+
+    tool = jpype.JClass("zserio.tools.ZserioTool")
+    executor = jpype.JClass("zserio.tools.ZserioTool$Executor").PYTHON_MAIN
+    system = jpype.JClass("java.lang.System")
+    byte_array_output_stream = jpype.JClass("java.io.ByteArrayOutputStream")
+    print_stream = jpype.JClass("java.io.PrintStream")
+
+    def run_tool(args):
+        stdout = byte_array_output_stream()
+        stderr = byte_array_output_stream()
+        # the worker compiles one request at a time, thus the usage of the process includes also the JVM threads
+        start_usage = resource.getrusage(resource.RUSAGE_SELF)
+        system.setOut(print_stream(stdout, True, "UTF-8"))
+        system.setErr(print_stream(stderr, True, "UTF-8"))
+        success = tool.runTool(args, executor)
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return {
+            "returncode": 0 if success else 1,
+            "stdout": stdout.toString("UTF-8"),
+            "stderr": stderr.toString("UTF-8"),
+            "cpu_time": usage.ru_utime + usage.ru_stime - start_usage.ru_utime - start_usage.ru_stime
+        }
+
+    # load and JIT the compiler classes of all generators before the first real job
+    with tempfile.TemporaryDirectory(prefix="interactive_zserio_warmup_") as warmup_dir:
+        with open(os.path.join(warmup_dir, "warmup.zs"), "w") as warmup_file:
+            warmup_file.write("package warmup;\n\nstruct Warmup\n{\n    uint32 value;\n};\n")
+        warmup_args = ["-src", warmup_dir, "warmup.zs"]
+        for generator in ["python", "cpp", "java", "xml", "doc"]:
+            warmup_args += ["-" + generator, os.path.join(warmup_dir, generator)]
+        run_tool(warmup_args)
+
+    return lambda request: run_tool(request["args"])
+
+COMPILER_WORKERS=int(os.getenv("INTERACTIVE_ZSERIO_COMPILER_WORKERS", "2"))
+WORKER_START_TIMEOUT=60
+WORKER_JOB_TIMEOUT=60
+CPU_TIME_METRIC="compiler.cpu_time"
+
+_compiler_pool = None
+_compiler_pool_lock = threading.Lock()
+
+if __name__ == "__main__":
+    serve(_start_jvm)
@@ -1,13 +1,15 @@
+import io
 import os
 import streamlit as st
 
-from zipfile import ZipFile
+from zipfile import ZipFile, ZIP_DEFLATED
 
-from interactive_zserio.widget import Widget
+from interactive_zserio.widget import Widget, timed
+from interactive_zserio.workspace import WorkspaceSnapshot
 
 class Downloader(Widget):
     def __init__(self, name, root, folder, zip_name, zip_folder=None, *, label=None, help=None,
-                 exclude_extensions=None):
+                 exclude_extensions=None, prepare_callback=None):
         super().__init__(name)
 
         self._root = root
@@ -17,22 +19,60 @@ class Downloader(Widget):
         self._label = label if label is not None else "Download"
         self._help = help
         self._exclude_extensions = exclude_extensions if exclude_extensions is not None else []
+        self._prepare_callback = prepare_callback
+        self._scopes = {}
 
+    def set_scopes(self, scopes):
+        # additional sub-folders which can be downloaded separately, e.g. output of a single generator
+        self._scopes = scopes
+
+    @timed
     def render(self):
         self._log("render")
 
-        zip_path = os.path.join(self._folder, self._zip_name)
-        if os.path.exists(zip_path):
-            os.remove(zip_path)
-
-        files_to_zip = []
-        for root, _, files in os.walk(self._folder):
-            for f in files:
-                if not any(f.endswith("*." + ext) for ext in self._exclude_extensions):
-                    files_to_zip.append(os.path.join(root, f))
-        with ZipFile(zip_path, "w") as zip_file:
-            for f in files_to_zip:
-                zip_file.write(f, os.path.relpath(f, self._root))
-
-        with open(zip_path, "rb") as zip_file:
-            st.download_button(self._label, zip_file, mime="application/zip", help=self._help)
+        scope = None
+        if self._scopes:
+            options = [None] + list(self._scopes)
+            if self._key("scope") in st.session_state and st.session_state[self._key("scope")] not in options:
+                del st.session_state[self._key("scope")]
+            scope = st.selectbox("Download content", options, key=self._key("scope"),
+                                 format_func=lambda x: "Whole workspace" if x is None else x)
+
+        if scope is None:
+            folder, arc_root, zip_name = self._folder, self._root, self._zip_name
+        else:
+            folder = self._scopes[scope]
+            arc_root, zip_name = os.path.dirname(folder), scope + ".zip"
+
+        # build the archive only on demand, it's not needed on most of the reruns
+        if st.button(self._label, key=self._key("prepare"), help=self._help):
+            if self._prepare_callback:
+                self._prepare_callback()
+            snapshot, zip_data = self._get_zip(folder, arc_root)
+            st.caption(f"{snapshot.count} files, {snapshot.size / 1024:.1f} KiB")
+            st.download_button(f"Save {zip_name}", zip_data, file_name=zip_name, mime="application/zip",
+                               key=self._key("download"))
+
+    @timed
+    def _get_zip(self, folder, arc_root):
+        snapshot = WorkspaceSnapshot(arc_root, [os.path.relpath(folder, arc_root)], self._exclude_extensions)
+        fingerprint = snapshot.fingerprint
+
+        if self._key("zips") not in st.session_state:
+            st.session_state[self._key("zips")] = {}
+        zips = st.session_state[self._key("zips")]
+        if folder in zips and zips[folder][0] == fingerprint:
+            self._log("reusing zip:", folder)
+            return snapshot, zips[folder][1]
+
+        self._log("building zip:", folder, snapshot.count, "files,", snapshot.size, "bytes")
+        zip_buffer = io.BytesIO()
+        with ZipFile(zip_buffer, "w", ZIP_DEFLATED) as zip_file:
+            for path in snapshot.files:
+                with zip_file.open(path, "w") as zip_entry:
+                    for chunk in snapshot.read_chunks(path):
+                        zip_entry.write(chunk)
+        zip_data = zip_buffer.getvalue()
+
+        zips[folder] = (fingerprint, zip_data)
+        return snapshot, zip_data
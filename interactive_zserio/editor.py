@@ -1,39 +1,130 @@
+import hashlib
 import os
+import tempfile
+import time
 import streamlit as st
 
 from streamlit_ace import st_ace
 
-from interactive_zserio.widget import Widget
+from interactive_zserio.widget import Widget, timed
 
 class Editor(Widget):
-    def __init__(self, name, root_dir, *, lang=None):
+    def __init__(self, name, root_dir, *, lang=None, edit_callback=None, flush_callback=None):
         super().__init__(name)
         self._root_dir = root_dir
 
         self._file_path = None
         self._lang = lang
         self._content = None
+        self._edit_callback = edit_callback
+        self._flush_callback = flush_callback
 
     def set_file(self, file_path):
         self._file_path = file_path
 
+    @timed
     def render(self):
         self._log("render")
-        with open(os.path.join(self._root_dir, self._file_path), "r") as f:
-            self._log("reading file:", self._file_path)
-            content = f.read()
+        buffer = self._get_buffer(self._file_path)
 
         # changing the key causes the content change - i.e. change it for each file!
         # (whitout changing the key, assigning the old content won't affect the real content of the editor)
         # see https://github.com/okld/streamlit-ace/issues/28
-        self._content = st_ace(content, key=self._key("content" + self._file_path),
+        self._content = st_ace(buffer.content, key=self._key("content" + self._file_path),
                                min_lines=12, language=self._lang)
-        if self._content != content:
-            with open(os.path.join(self._root_dir, self._file_path), "w") as f:
-                self._log("writing file:", self._file_path)
-                f.write(self._content)
+        if self._content != buffer.content:
+            buffer.edit(self._content)
+            if self._edit_callback:
+                self._edit_callback(self._file_path, buffer.content, buffer.hash)
+
+        # the file is written at most once per interval, consumers needing the file call flush explicitly
+        if buffer.dirty and time.monotonic() - buffer.flushed >= FLUSH_INTERVAL:
+            self._flush_buffer(self._buffers, self._file_path, buffer)
 
     @property
     def content(self):
         return self._content
 
+    def flush(self):
+        self._flush_buffers(self._buffers)
+
+    def flusher(self):
+        # flushes the buffers also outside of the script run, e.g. before the idle workspace is evicted
+        buffers = self._buffers
+        return lambda: self._flush_buffers(buffers)
+
+    def _flush_buffers(self, buffers):
+        for file_path, buffer in list(buffers.items()):
+            if buffer.dirty:
+                self._flush_buffer(buffers, file_path, buffer)
+
+    @property
+    def _buffers(self):
+        if self._key("buffers") not in st.session_state:
+            st.session_state[self._key("buffers")] = {}
+        return st.session_state[self._key("buffers")]
+
+    def _get_buffer(self, file_path):
+        full_path = os.path.join(self._root_dir, file_path)
+        buffer = self._buffers.get(file_path)
+        if buffer is None or buffer.stat_key != _stat_key(full_path):
+            # first open or the file has been replaced by someone else (upload, restore, ...)
+            with open(full_path, "r") as f:
+                self._log("reading file:", file_path)
+                content = f.read()
+            buffer = EditorBuffer(content, _stat_key(full_path))
+            self._buffers[file_path] = buffer
+        return buffer
+
+    def _flush_buffer(self, buffers, file_path, buffer):
+        full_path = os.path.join(self._root_dir, file_path)
+        if buffer.stat_key != _stat_key(full_path):
+            # the file has been removed or replaced meanwhile, don't resurrect stale content
+            self._log("dropping buffer:", file_path)
+            del buffers[file_path]
+            return
+
+        self._log("writing file:", file_path)
+        # write to a temporary file and rename it to never expose a partially written file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(full_path),
+                                        prefix="." + os.path.basename(full_path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(buffer.content)
+            os.chmod(tmp_path, os.stat(full_path).st_mode)
+            os.replace(tmp_path, full_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        buffer.stat_key = _stat_key(full_path)
+        buffer.dirty = False
+        buffer.flushed = time.monotonic()
+
+        if self._flush_callback:
+            self._flush_callback(file_path, buffer.content, buffer.hash)
+
+class EditorBuffer:
+    def __init__(self, content, stat_key):
+        self.content = content
+        self.hash = _hash(content)
+        self.stat_key = stat_key
+        self.dirty = False
+        self.flushed = 0
+
+    def edit(self, content):
+        self.content = content
+        self.hash = _hash(content)
+        self.dirty = True
+
+def _hash(content):
+    return hashlib.sha256(content.encode()).hexdigest()
+
+def _stat_key(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+FLUSH_INTERVAL=2
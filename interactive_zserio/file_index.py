@@ -0,0 +1,88 @@
+import os
+import streamlit as st
+
+class FileIndex:
+    def __init__(self, folder, extension):
+        self._folder = folder
+        self._extension = extension
+        self._dirs = {}
+        self._files = None
+
+    @staticmethod
+    def get(folder, extension):
+        registry = FileIndex._registry()
+        if (folder, extension) not in registry:
+            registry[(folder, extension)] = FileIndex(folder, extension)
+        return registry[(folder, extension)]
+
+    @staticmethod
+    def invalidate(folder):
+        # used after bulk operations like upload or restore of a workspace
+        registry = FileIndex._registry()
+        for key in [key for key in registry if _is_within(key[0], folder)]:
+            del registry[key]
+
+    def files(self):
+        if self._validate(""):
+            self._files = None
+        if self._files is None:
+            self._files = sorted(path for _, files, _ in self._dirs.values() for path in files)
+        return list(self._files)
+
+    def changed(self, path):
+        # make sure the change is seen even if it didn't change mtime of the directories
+        rel_dir = os.path.dirname(os.path.normpath(path))
+        while True:
+            if rel_dir in self._dirs:
+                mtime, files, sub_dirs = self._dirs[rel_dir]
+                self._dirs[rel_dir] = (None, files, sub_dirs)
+            if not rel_dir:
+                break
+            rel_dir = os.path.dirname(rel_dir)
+
+    def _validate(self, rel_dir):
+        # only directories whose mtime has changed are listed again
+        try:
+            mtime = os.stat(os.path.join(self._folder, rel_dir)).st_mtime_ns
+        except OSError:
+            return self._forget(rel_dir)
+
+        changed = False
+        if rel_dir not in self._dirs or self._dirs[rel_dir][0] != mtime:
+            files = []
+            sub_dirs = []
+            with os.scandir(os.path.join(self._folder, rel_dir)) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        sub_dirs.append(os.path.join(rel_dir, entry.name))
+                    elif entry.name.endswith("." + self._extension):
+                        files.append(os.path.join(rel_dir, entry.name))
+            for removed_dir in set(self._dirs[rel_dir][2] if rel_dir in self._dirs else []) - set(sub_dirs):
+                self._forget(removed_dir)
+            self._dirs[rel_dir] = (mtime, files, sub_dirs)
+            changed = True
+
+        for sub_dir in self._dirs[rel_dir][2]:
+            changed = self._validate(sub_dir) or changed
+
+        return changed
+
+    def _forget(self, rel_dir):
+        if rel_dir not in self._dirs:
+            return False
+        for sub_dir in self._dirs.pop(rel_dir)[2]:
+            self._forget(sub_dir)
+        return True
+
+    @staticmethod
+    def _registry():
+        if REGISTRY_KEY not in st.session_state:
+            st.session_state[REGISTRY_KEY] = {}
+        return st.session_state[REGISTRY_KEY]
+
+def _is_within(path, folder):
+    path = os.path.normpath(path)
+    folder = os.path.normpath(folder)
+    return path == folder or path.startswith(folder + os.sep)
+
+REGISTRY_KEY="file_index_registry"
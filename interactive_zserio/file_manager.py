@@ -1,7 +1,8 @@
 import os
 import streamlit as st
 
-from interactive_zserio.widget import Widget
+from interactive_zserio.widget import Widget, timed
+from interactive_zserio.file_index import FileIndex
 
 class FileManager(Widget):
     def __init__(self, name, folder, extension, new_file_callback=None):
@@ -12,6 +13,7 @@ class FileManager(Widget):
 
         self._selected_file = None
 
+    @timed
     def render(self):
         self._log("render")
         options = self._list_files()
@@ -20,6 +22,15 @@ class FileManager(Widget):
             if self._key("initial_option") in st.session_state:
                 st.session_state[self._key("selected_file")] = st.session_state[self._key("initial_option")]
 
+            if len(options) > SEARCH_THRESHOLD:
+                search = st.text_input(f"Search *.{self._extension} files", key=self._key("search"),
+                                       placeholder="Type to filter files")
+                found = [option for option in options if search.lower() in option.lower()]
+                if found:
+                    options = found
+                else:
+                    st.caption("No file matches the search.")
+
             options.append("Create new...")
 
             # reset if selected file is not present in current options
@@ -39,6 +50,7 @@ class FileManager(Widget):
             if remove_file:
                 self._log("removing file:", selected_file)
                 os.remove(os.path.join(self._folder, selected_file))
+                self._index.changed(selected_file)
                 st.experimental_rerun()
 
         if not options or selected_file == "Create new...":
@@ -75,17 +87,18 @@ class FileManager(Widget):
 
         self._log("creating file:", new_file_path)
         open(new_file_full_path, "w").close()
+        self._index.changed(new_file_path)
 
         if self._new_file_callback:
             self._new_file_callback(self._folder, new_file_path)
 
         return new_file_path
 
+    @property
+    def _index(self):
+        return FileIndex.get(self._folder, self._extension)
+
     def _list_files(self):
-        listed_files = []
-        for root, _, files in os.walk(self._folder):
-            for listed_file in files:
-                if listed_file.endswith("." + self._extension):
-                    listed_files.append(os.path.relpath(os.path.join(root, listed_file), self._folder))
-        listed_files.sort()
-        return listed_files
+        return self._index.files()
+
+SEARCH_THRESHOLD=20
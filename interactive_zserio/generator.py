@@ -1,18 +1,27 @@
 import os
 import shutil
 import streamlit as st
-import zserio
+import time
 
-from interactive_zserio.widget import Widget
+from interactive_zserio.widget import Widget, timed
+from interactive_zserio.compiler_pool import CompilerPool
+from interactive_zserio.compile_cache import CompileCache
+from interactive_zserio.compile_service import CompileService, GENERATORS
+from interactive_zserio.schema_index import SchemaIndex
+from interactive_zserio.scheduler import Scheduler
 
 class Generator(Widget):
-    def __init__(self, zs_dir, gen_dir):
+    def __init__(self, zs_dir, gen_dir, *, compile_callback=None):
         super().__init__("generator")
         self._zs_dir = zs_dir
         self._gen_dir = gen_dir
+        self._compile_callback = compile_callback
 
         self._zs_file_path = None
 
+        # start warming up the compiler workers as soon as possible
+        CompilerPool.instance()
+
     def get_state(self):
         return {"generators": self.generators, "extra_args": self.extra_args }
 
@@ -26,6 +35,11 @@ class Generator(Widget):
     def set_zs_file_path(self, zs_file_path):
         self._zs_file_path = zs_file_path
 
+    @property
+    def zs_file_path(self):
+        return self._zs_file_path
+
+    @timed
     def render(self):
         self._log("render")
 
@@ -39,12 +53,13 @@ class Generator(Widget):
             with generators_cols[i]:
                 generators_checks.append(st.checkbox(generator, key=self._key(generator + "_gen")))
 
-        if self._needs_recompilation():
-            shutil.rmtree(self._gen_dir)
-            os.makedirs(self._gen_dir)
+        outdated_generators, schema_digest = self._update_generated()
+        if outdated_generators:
+            if self._compile_callback:
+                # e.g. to write edited schema files, the digest already reflects their content
+                self._compile_callback()
             with st.spinner("Compiling..."):
-                if not self._compile():
-                    del st.session_state[self._key("recompile_params")]
+                if not self._compile(outdated_generators, schema_digest):
                     return False
         else:
             st.info("No recompilation needed")
@@ -65,51 +80,81 @@ class Generator(Widget):
                                      else False)
         return generators
 
+    def output_digest(self, generator):
+        generated = st.session_state.get(self._key("recompile_params"), {})
+        if generator not in generated:
+            return None
+        extra_args, zs_file_path, schema_digest = generated[generator]
+        return CompileCache.make_key(schema_digest, zs_file_path, extra_args, generator)
+
+    @property
+    def schema_index(self):
+        if self._key("schema_index") not in st.session_state:
+            st.session_state[self._key("schema_index")] = SchemaIndex(self._zs_dir)
+        return st.session_state[self._key("schema_index")]
+
     def reset(self):
         self._log("reset")
         if self._key("recompile_params") in st.session_state:
             del st.session_state[self._key("recompile_params")]
 
-    def _needs_recompilation(self):
-        with open(os.path.join(self._zs_dir, self._zs_file_path), "r") as zs_file:
-            recompile_params = (self.generators, self.extra_args, self._zs_file_path, zs_file.read())
+    def _update_generated(self):
+        schema_digest = self.schema_index.digest(self._zs_file_path)
+        recompile_params = (self.extra_args, self._zs_file_path, schema_digest)
 
         self._log("recompile_params:", recompile_params)
 
-        if (self._key("recompile_params") not in st.session_state or
-            st.session_state[self._key("recompile_params")] != recompile_params):
-            st.session_state[self._key("recompile_params")] = recompile_params
-            return True
+        if self._key("recompile_params") not in st.session_state:
+            st.session_state[self._key("recompile_params")] = {}
+        generated = st.session_state[self._key("recompile_params")]
 
-        return False
-
-    def _compile(self):
-        args = []
-        args += st.session_state[self._key("extra_args")].split()
-        args += ["-src", self._zs_dir]
-        args.append(self._zs_file_path)
+        outdated_generators = []
         for generator, checked in self.generators.items():
-            if checked:
-                args += ["-" + generator, os.path.join(self._gen_dir, generator)]
-
-        self._log("compile:", args)
-        completed_process = zserio.run_compiler(args)
-        if completed_process.returncode != 0:
-            # double whitespace needed before a newline for markdown to render the newline
-            # see https://github.com/streamlit/streamlit/issues/868
-            st.error(completed_process.stderr.replace("\n", "  \n"))
-            return False
-
-        # show zserio warnings
-        if completed_process.stderr:
-            st.warning(completed_process.stderr.replace("\n", "  \n"))
-
-        return True
-
-GENERATORS=[
-    "python",
-    "cpp",
-    "java",
-    "xml",
-    "doc",
-]
+            if not checked:
+                if generator in generated:
+                    self._log("removing generated:", generator)
+                    shutil.rmtree(os.path.join(self._gen_dir, generator), ignore_errors=True)
+                    del generated[generator]
+            elif generated.get(generator) != recompile_params:
+                generated[generator] = recompile_params
+                outdated_generators.append(generator)
+
+        return outdated_generators, schema_digest
+
+    @timed
+    def _compile(self, generators, schema_digest):
+        start = time.perf_counter()
+        compile_service = CompileService(self._zs_dir, self._gen_dir, self.schema_index)
+        results = compile_service.compile(self._zs_file_path, self.extra_args, generators, schema_digest,
+                                          submit=self._submit, wait=self._wait_for)
+        elapsed = time.perf_counter() - start
+
+        self._log("compiled in:", elapsed, [(result.generator, result.elapsed, result.source)
+                                            for result in results])
+        st.caption(f"Compiled in {elapsed:.2f}s (" +
+                   ", ".join(f"{result.generator}: {result.elapsed:.2f}s {result.source}"
+                             for result in results) + ")")
+
+        success = True
+        messages = set()
+        for result in results:
+            completed_process = result.completed_process
+            if completed_process.returncode != 0:
+                del st.session_state[self._key("recompile_params")][result.generator]
+                success = False
+
+            # all generators share the same schema, thus report each message only once
+            if completed_process.stderr and completed_process.stderr not in messages:
+                messages.add(completed_process.stderr)
+                # double whitespace needed before a newline for markdown to render the newline
+                # see https://github.com/streamlit/streamlit/issues/868
+                if completed_process.returncode != 0:
+                    st.error(completed_process.stderr.replace("\n", "  \n"))
+                else:
+                    # show zserio warnings
+                    st.warning(completed_process.stderr.replace("\n", "  \n"))
+
+        return success
+
+    def _submit(self, key, func, *args):
+        return Scheduler.instance().submit(self._session_id, key, func, *args)
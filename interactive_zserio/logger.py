@@ -1,10 +1,51 @@
+import os
 import sys
 from datetime import datetime
 
 class Logger:
+    DEBUG = 10
+    INFO = 20
+    WARNING = 30
+    ERROR = 40
+
+    @staticmethod
+    def enabled(level):
+        return level >= LOG_LEVEL
+
     @staticmethod
     def log(*args):
-        if LOGGING_ENABLED:
-            print(datetime.now(), *args, file=sys.stderr)
+        Logger.debug(*args)
+
+    @staticmethod
+    def debug(*args):
+        # arguments are formatted only when the level is enabled, don't format them at call sites
+        if Logger.DEBUG >= LOG_LEVEL:
+            _write("DEBUG", args)
+
+    @staticmethod
+    def info(*args):
+        if Logger.INFO >= LOG_LEVEL:
+            _write("INFO", args)
+
+    @staticmethod
+    def warning(*args):
+        if Logger.WARNING >= LOG_LEVEL:
+            _write("WARNING", args)
+
+    @staticmethod
+    def error(*args):
+        if Logger.ERROR >= LOG_LEVEL:
+            _write("ERROR", args)
+
+def _write(level_name, args):
+    print(datetime.now(), level_name, *args, file=sys.stderr)
+
+def _log_level(name):
+    level = {"DEBUG": Logger.DEBUG, "INFO": Logger.INFO, "WARNING": Logger.WARNING, "ERROR": Logger.ERROR}.get(
+        name.upper())
+    if level is None:
+        _write("WARNING", ("logger:", "unknown log level:", name, "using: info"))
+        return Logger.INFO
+    return level
 
-LOGGING_ENABLED=True
+LOG_LEVEL=_log_level(os.getenv("INTERACTIVE_ZSERIO_LOG_LEVEL", "info"))
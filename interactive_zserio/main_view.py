@@ -6,17 +6,22 @@ import zserio
 from tempfile import TemporaryDirectory
 from importlib.metadata import version
 
-from interactive_zserio.widget import Widget
+from interactive_zserio.widget import Widget, fragment, timed
 from interactive_zserio.workspace import Workspace
 from interactive_zserio.urlutil import URLUtil
-from interactive_zserio.share_rtdb import ShareRTDB
+from interactive_zserio.share import Share
 from interactive_zserio.uploader import Uploader
 from interactive_zserio.file_manager import FileManager
 from interactive_zserio.editor import Editor
 from interactive_zserio.generator import Generator
 from interactive_zserio.sources_viewer import SourcesViewer
 from interactive_zserio.python_runner import PythonRunner
+from interactive_zserio.serialization_bench import SerializationBench
+from interactive_zserio.blob_inspector import BlobInspector, DECODE_POLL_INTERVAL
 from interactive_zserio.downloader import Downloader
+from interactive_zserio.session_registry import SessionRegistry
+from interactive_zserio.metrics_server import MetricsServer
+from interactive_zserio.admin_view import AdminView
 
 class MainView(Widget):
     def __init__(self):
@@ -28,27 +33,37 @@ class MainView(Widget):
             st.session_state[self._key("temp_dir")] = TemporaryDirectory(prefix="interactive_zserio_")
             self._log("created new temp directory:", st.session_state[self._key("temp_dir")])
 
+        MetricsServer.start()
+
         self._urlutil = URLUtil()
         self._workspace = Workspace(os.path.join(self._tmp_dir, "workspace"))
         self._zip_name = "workspace.zip"
 
-        self._uploader = Uploader(self._tmp_dir, self._workspace.ws_dir, self._workspace.zs_dir)
+        self._uploader = Uploader(self._tmp_dir, self._workspace, self._workspace_reset_callback)
         self._schema_file_manager = FileManager("schema_file_manager", self._workspace.zs_dir, "zs",
                                                 self._new_schema_file_callback)
-        self._schema_editor = Editor("schema_editor", self._workspace.zs_dir)
-        self._generator = Generator(self._workspace.zs_dir, self._workspace.gen_dir)
+        self._schema_editor = Editor("schema_editor", self._workspace.zs_dir,
+                                     edit_callback=self._schema_content_callback,
+                                     flush_callback=self._schema_content_callback)
+        self._generator = Generator(self._workspace.zs_dir, self._workspace.gen_dir,
+                                    compile_callback=self._schema_editor.flush)
         self._sources_viewer = SourcesViewer(self._workspace.gen_dir)
 
         self._python_runner = PythonRunner(os.path.join(self._workspace.gen_dir, "python"),
                                            os.path.join(self._workspace.src_dir, "python"))
+        self._serialization_bench = SerializationBench(os.path.join(self._tmp_dir, "serialization_bench"),
+                                                       self._workspace.zs_dir, self._generator)
+        self._blob_inspector = BlobInspector(os.path.join(self._tmp_dir, "blobs"),
+                                             os.path.join(self._workspace.gen_dir, "python"))
 
-        self._share = ShareRTDB(self._workspace, self._generator, self._python_runner)
+        self._share = Share(self._workspace, self._generator, self._python_runner)
 
         self._workspace_downloader = Downloader("workspace_downloader",
                                                 self._tmp_dir, self._workspace.ws_dir, self._zip_name,
                                                 label="Download workspace",
                                                 help="Download whole workspace as a zip file.",
-                                                exclude_extensions=["zip"])
+                                                exclude_extensions=["zip"],
+                                                prepare_callback=self._flush_editors)
 
         if self._key("schema_mode") not in st.session_state:
             # initialize on the first run or after refresh (F5)
@@ -65,6 +80,8 @@ class MainView(Widget):
                 st.session_state[self._key("schema_mode")] = "sample"
                 self._share.restore_sample()
 
+        self._activate(rerun=False)
+
 
     @property
     def _tmp_dir(self):
@@ -74,9 +91,14 @@ class MainView(Widget):
     def _schema_mode(self):
         return st.session_state[self._key("schema_mode")]
 
+    @timed
     def render(self):
         self._log("render")
 
+        if AdminView.requested(self._urlutil.get_url_params()):
+            AdminView().render()
+            return
+
         st.write(f"""
             <h1>Interactive Zserio<sup style="top: -2em;">{version("zserio")}</sup> Compiler!</h1>
         """, unsafe_allow_html=True)
@@ -94,16 +116,66 @@ class MainView(Widget):
 
         self._generator.set_zs_file_path(self._schema_file_manager.selected_file)
         if self._generator.render():
-            self._sources_viewer.set_generators(self._generator.generators)
-            self._sources_viewer.render()
-
-            self._python_runner.set_python_generated(self._generator.generators["python"])
-            self._python_runner.render()
-
+            # widgets below are fragments, their interactions rerun only themselves,
+            # changes of the schema or of the generator settings rerun the whole script
+            generators = self._generator.generators
+            self._render_sources_viewer(generators, {generator: self._generator.output_digest(generator)
+                                                     for generator in generators})
+            self._render_python_runner(generators["python"], self._generator.output_digest("python"))
+            self._render_serialization_bench(generators["python"])
+            self._render_blob_inspector(generators["python"], self._generator.output_digest("python"))
+            if self._blob_inspector.decoding:
+                self._render_blob_decoding()
+
+        self._render_downloader({
+            generator: os.path.join(self._workspace.gen_dir, generator)
+            for generator, checked in self._generator.generators.items()
+            if checked and os.path.isdir(os.path.join(self._workspace.gen_dir, generator))
+        })
+        self._render_share()
+
+    @fragment
+    def _render_sources_viewer(self, generators, digests):
+        self._activate()
+        self._sources_viewer.set_generators(generators, digests)
+        self._sources_viewer.render()
+
+    @fragment
+    def _render_python_runner(self, python_generated, python_digest):
+        self._activate()
+        self._python_runner.set_python_generated(python_generated, python_digest)
+        self._python_runner.render()
+
+    @fragment
+    def _render_serialization_bench(self, python_generated):
+        self._activate()
+        self._serialization_bench.set_python_generated(python_generated)
+        self._serialization_bench.render()
+
+    @fragment
+    def _render_blob_inspector(self, python_generated, python_digest):
+        self._activate()
+        self._blob_inspector.set_python_generated(python_generated, python_digest)
+        self._blob_inspector.render()
+
+    # fragments can't be nested, thus the polling of the decoding isn't a part of the blob inspector fragment
+    @fragment(run_every=DECODE_POLL_INTERVAL)
+    def _render_blob_decoding(self):
+        self._activate()
+        self._blob_inspector.render_decoding()
+
+    @fragment
+    def _render_downloader(self, scopes):
+        self._activate()
+        self._workspace_downloader.set_scopes(scopes)
         self._workspace_downloader.render()
+
+    @fragment
+    def _render_share(self):
+        self._activate()
         share_button = st.button("Save & Share Workspace")
         if share_button:
-            self._share.delete_old_shares()
+            self._flush_editors()
 
             if (not self._key("share_id") in st.session_state or not
                 self._share.is_owner(st.session_state[self._key("owner_id")],
@@ -120,6 +192,32 @@ class MainView(Widget):
                 del st.session_state[self._key("share_id")]
                 st.warning("sharing failed, please report an issue!")
 
+    def _activate(self, rerun=True):
+        flushers = [self._schema_editor.flusher(), self._python_runner.flusher()]
+        files = SessionRegistry.instance().activate(self._session_id, self._tmp_dir, self._workspace.ws_dir,
+                                                    lambda: [flush() for flush in flushers])
+        if files is not None:
+            # the workspace has been evicted while the session was idle
+            self._log("rehydrating workspace")
+            self._workspace.reset()
+            self._workspace.restore(files)
+            self._generator.reset()
+            if rerun:
+                # a fragment needs the whole script to regenerate the workspace, the rerun isn't used
+                # in the whole script as it drops the state of the widgets which are not rendered yet
+                st.experimental_rerun()
+
+    def _flush_editors(self):
+        self._schema_editor.flush()
+        self._python_runner.flush()
+
+    def _workspace_reset_callback(self):
+        self._generator.reset()
+
+    def _schema_content_callback(self, file_path, content, content_hash):
+        # the schema index sees also edits which are not flushed yet, thus the digest is always up to date
+        self._generator.schema_index.update(file_path, content, content_hash)
+
     def _new_schema_file_callback(self, folder, file_path):
         package_definition = ".".join(os.path.splitext(file_path)[0].split(os.sep))
         self._log("new schema file:", package_definition)
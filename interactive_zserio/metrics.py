@@ -0,0 +1,88 @@
+import bisect
+import threading
+import time
+
+from contextlib import contextmanager
+
+class Histogram:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.buckets[bisect.bisect_left(BUCKETS, value)] += 1
+
+    def percentile(self, percentile):
+        # upper bound of the bucket containing the percentile
+        rank = percentile / 100 * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                return BUCKETS[i] if i < len(BUCKETS) else self.max
+        return 0.0
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "max": self.max
+        }
+
+class Metrics:
+    def __init__(self):
+        self._histograms = {}
+        self._session_histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def instance():
+        global _metrics
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics()
+            return _metrics
+
+    @contextmanager
+    def span(self, name, session_id=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, session_id)
+
+    def observe(self, name, seconds, session_id=None):
+        with self._lock:
+            self._histograms.setdefault(name, Histogram()).observe(seconds)
+            if session_id is not None:
+                session_histograms = self._session_histograms.setdefault(session_id, {})
+                session_histograms.setdefault(name, Histogram()).observe(seconds)
+
+    def snapshot(self, session_id=None):
+        with self._lock:
+            histograms = (self._histograms if session_id is None
+                          else self._session_histograms.get(session_id, {}))
+            return {name: histogram.to_dict() for name, histogram in sorted(histograms.items())}
+
+    @property
+    def sessions(self):
+        with self._lock:
+            return list(self._session_histograms)
+
+    def forget_session(self, session_id):
+        with self._lock:
+            self._session_histograms.pop(session_id, None)
+
+# upper bounds of the buckets in seconds, 1ms - 32s
+BUCKETS=[0.001 * 2 ** i for i in range(16)]
+
+_metrics = None
+_metrics_lock = threading.Lock()
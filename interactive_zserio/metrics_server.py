@@ -0,0 +1,61 @@
+import json
+import os
+import threading
+
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from interactive_zserio.logger import Logger
+from interactive_zserio.metrics import Metrics
+from interactive_zserio.scheduler import Scheduler
+from interactive_zserio.compile_cache import CompileCache
+from interactive_zserio.session_registry import SessionRegistry
+
+class MetricsServer:
+    def __init__(self, port):
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics_server", daemon=True).start()
+        Logger.info("metrics_server:", "serving metrics on port:", self._server.server_address[1])
+
+    @staticmethod
+    def start():
+        # the endpoint is local only and disabled by default
+        global _metrics_server
+        with _metrics_server_lock:
+            if _metrics_server is None and METRICS_PORT:
+                try:
+                    _metrics_server = MetricsServer(METRICS_PORT)
+                except OSError as e:
+                    # the application must work without the endpoint, don't try it again in every session
+                    Logger.warning("metrics_server:", "failed to serve metrics on port:", METRICS_PORT, e)
+                    _metrics_server = False
+
+def collect():
+    metrics = Metrics.instance()
+    return {
+        "metrics": metrics.snapshot(),
+        "session_metrics": {session_id: metrics.snapshot(session_id) for session_id in metrics.sessions},
+        "scheduler": Scheduler.instance().stats,
+        "compile_cache": CompileCache.instance().stats,
+        "sessions": SessionRegistry.instance().stats
+    }
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        content = json.dumps(collect(), indent=2).encode()
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+METRICS_PORT=int(os.getenv("INTERACTIVE_ZSERIO_METRICS_PORT", "0"))
+
+_metrics_server = None
+_metrics_server_lock = threading.Lock()
@@ -0,0 +1,176 @@
+import os
+import resource
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import zserio # preloaded in the warm parent, thus the forked children don't need to import it again
+
+from interactive_zserio.worker_pool import Worker, WorkerError, WorkerPool, serve
+from interactive_zserio.metrics import Metrics
+
+class PythonPool(WorkerPool):
+    def __init__(self, size):
+        super().__init__("python_pool", size,
+                         lambda: Worker("interactive_zserio.python_pool", env=SANDBOX_ENV))
+
+    @staticmethod
+    def instance():
+        global _python_pool
+        with _python_pool_lock:
+            if _python_pool is None:
+                _python_pool = PythonPool(PYTHON_WORKERS)
+            return _python_pool
+
+    def run(self, code, cwd, timeout, session_id=None):
+        args = [sys.executable, "-c", code]
+
+        worker = self._acquire(timeout)
+        if worker is not None:
+            try:
+                # the warm parent doesn't get the server environment, thus it gets the limits with the request
+                response = worker.request({"code": code, "cwd": cwd, "timeout": timeout,
+                                           "memory_limit": MEMORY_LIMIT},
+                                          timeout + WORKER_RESPONSE_MARGIN)
+                self._release(worker)
+            except WorkerError as e:
+                self._discard(worker, e)
+            else:
+                return _complete(args, timeout, response, session_id)
+
+        return _complete(args, timeout, _run_cold(args, cwd, timeout), session_id)
+
+def _complete(args, timeout, response, session_id):
+    # CPU time of the user code itself, without waiting for the pool and the I/O
+    Metrics.instance().observe(CPU_TIME_METRIC, response["cpu_time"], session_id)
+    if response["timed_out"]:
+        raise subprocess.TimeoutExpired(args, timeout, response["stdout"], response["stderr"])
+    return subprocess.CompletedProcess(args, response["returncode"], response["stdout"], response["stderr"])
+
+def set_limits(timeout, memory_limit):
+    cpu_limit = int(timeout) + 1
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, cpu_limit))
+    resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (OUTPUT_LIMIT, OUTPUT_LIMIT))
+
+def _run_child(channel, request, stdout_path, stderr_path):
+    # the child must never talk to the server
+    os.close(channel.fileno())
+    os.setsid()
+
+    null_fd = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(null_fd, 0)
+    for fd, path in ((1, stdout_path), (2, stderr_path)):
+        output_fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.dup2(output_fd, fd)
+
+    set_limits(request["timeout"], request["memory_limit"])
+
+    # mimic "python -c"
+    os.chdir(request["cwd"])
+    sys.path.insert(0, request["cwd"])
+    sys.argv = ["-c"]
+    sys.dont_write_bytecode = True
+
+    exit_code = 0
+    try:
+        exec(compile(request["code"], "<string>", "exec"), {"__name__": "__main__", "__builtins__": __builtins__})
+    except SystemExit as e:
+        if e.code is None:
+            exit_code = 0
+        elif isinstance(e.code, int):
+            exit_code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException as e:
+        # skip the frame of this function
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        exit_code = 1
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    return exit_code
+
+def _read_output(path):
+    with open(path, "rb") as f:
+        return f.read(OUTPUT_LIMIT).decode("utf-8", errors="replace")
+
+def _wait(pid, timeout, stdout_path, stderr_path):
+    deadline = time.monotonic() + timeout
+    delay = CHILD_POLL_INTERVAL
+    timed_out = False
+    while True:
+        waited_pid, status, rusage = os.wait4(pid, os.WNOHANG)
+        if waited_pid:
+            break
+        if time.monotonic() >= deadline:
+            # kill also everything the child could spawn
+            os.killpg(pid, signal.SIGKILL)
+            _, status, rusage = os.wait4(pid, 0)
+            timed_out = True
+            break
+        time.sleep(delay)
+        delay = min(delay * 2, CHILD_MAX_POLL_INTERVAL)
+
+    return {
+        "returncode": os.waitstatus_to_exitcode(status),
+        "stdout": _read_output(stdout_path),
+        "stderr": _read_output(stderr_path),
+        "timed_out": timed_out,
+        "cpu_time": rusage.ru_utime + rusage.ru_stime
+    }
+
+def _run_forked(channel, request):
+    with tempfile.TemporaryDirectory(prefix="interactive_zserio_run_") as run_dir:
+        stdout_path = os.path.join(run_dir, "stdout")
+        stderr_path = os.path.join(run_dir, "stderr")
+
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                exit_code = _run_child(channel, request, stdout_path, stderr_path)
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                os._exit(exit_code)
+
+        return _wait(pid, request["timeout"], stdout_path, stderr_path)
+
+def _run_cold(args, cwd, timeout):
+    with tempfile.TemporaryDirectory(prefix="interactive_zserio_run_") as run_dir:
+        stdout_path = os.path.join(run_dir, "stdout")
+        stderr_path = os.path.join(run_dir, "stderr")
+
+        with open(stdout_path, "wb") as stdout, open(stderr_path, "wb") as stderr:
+            process = subprocess.Popen(args, cwd=cwd, env=SANDBOX_ENV, stdin=subprocess.DEVNULL, stdout=stdout,
+                                       stderr=stderr, start_new_session=True,
+                                       preexec_fn=lambda: set_limits(timeout, MEMORY_LIMIT))
+        response = _wait(process.pid, timeout, stdout_path, stderr_path)
+        # the process is already reaped by _wait
+        process.returncode = response["returncode"]
+        return response
+
+def _start_zygote(channel):
+    return lambda request: _run_forked(channel, request)
+
+PYTHON_WORKERS=int(os.getenv("INTERACTIVE_ZSERIO_PYTHON_WORKERS", "2"))
+MEMORY_LIMIT=int(os.getenv("INTERACTIVE_ZSERIO_PYTHON_MEMORY_MB", "1024")) * 1024 * 1024
+OUTPUT_LIMIT=1024 * 1024
+SANDBOX_ENV={
+    "PYTHONDONTWRITEBYTECODE" : "1"
+}
+WORKER_RESPONSE_MARGIN=5
+CPU_TIME_METRIC="python.cpu_time"
+CHILD_POLL_INTERVAL=0.0005
+CHILD_MAX_POLL_INTERVAL=0.01
+
+_python_pool = None
+_python_pool_lock = threading.Lock()
+
+if __name__ == "__main__":
+    serve(_start_zygote)
@@ -1,10 +1,13 @@
+import hashlib
 import streamlit as st
 import subprocess
-import sys
 
-from interactive_zserio.widget import Widget
+from interactive_zserio.widget import Widget, timed
 from interactive_zserio.file_manager import FileManager
 from interactive_zserio.editor import Editor
+from interactive_zserio.scheduler import Scheduler
+from interactive_zserio.python_pool import PythonPool
+from interactive_zserio.metrics import Metrics
 
 class PythonRunner(Widget):
     def __init__(self, python_gen_dir, src_dir):
@@ -16,9 +19,14 @@ class PythonRunner(Widget):
         self._python_editor = Editor("python_editor", self._src_dir, lang="python")
 
         self._python_generated = None
+        self._python_digest = None
 
-    def set_python_generated(self, python_generated):
+        # start forking the warm python workers as soon as possible
+        PythonPool.instance()
+
+    def set_python_generated(self, python_generated, python_digest=None):
         self._python_generated = python_generated
+        self._python_digest = python_digest
 
     @property
     def check(self):
@@ -28,6 +36,13 @@ class PythonRunner(Widget):
     def check(self, value):
         st.session_state[self._key("check")] = value
 
+    def flush(self):
+        self._python_editor.flush()
+
+    def flusher(self):
+        return self._python_editor.flusher()
+
+    @timed
     def render(self):
         self._log("render")
 
@@ -42,25 +57,47 @@ class PythonRunner(Widget):
         self._python_editor.set_file(self._python_file_manager.selected_file)
         self._python_editor.render()
 
-        self._log("executing code:", self._python_file_manager.selected_file)
+        code = self._python_editor.content
+        run_key = hashlib.sha256(f"{self._python_digest}\0{code}".encode()).hexdigest()
+        run_again = st.button("Run again", key=self._key("run_again"),
+                              help="Run the code again even if neither the code nor the generated sources changed.")
 
-        try:
-            completed_process = subprocess.run(
-                [sys.executable, "-c", self._python_editor.content],
-                cwd=self._python_gen_dir,
-                env={
-                    "PYTHONDONTWRITEBYTECODE" : "1"
-                },
-                capture_output=True, text=True,
-                timeout=5
-            )
+        result = st.session_state.get(self._key("result"))
+        if run_again or self._python_digest is None or result is None or result[0] != run_key:
+            self._log("executing code:", self._python_file_manager.selected_file)
+
+            # identical runs of the session can be shared, unless explicitly run again, other sessions need
+            # their own runs as the code sees the working directory and its CPU time is accounted to the session
+            job = Scheduler.instance().submit(self._session_id, None if run_again else
+                                              ("python", self._session_id, self._python_gen_dir, run_key),
+                                              _run_python, code, self._python_gen_dir, self._session_id)
+            self._wait_for([job])
+            result = (run_key, self._get_output(job))
+            st.session_state[self._key("result")] = result
+        else:
+            self._log("reusing output of:", self._python_file_manager.selected_file)
 
+        stdout, stderr, error = result[1]
+        if error:
+            st.error(error)
+        else:
             st.caption("Python output")
-            if completed_process.stdout:
-                st.text(completed_process.stdout)
-            if completed_process.stderr:
-                st.error(completed_process.stderr)
+            if stdout:
+                st.text(stdout)
+            if stderr:
+                st.error(stderr)
+
+    def _get_output(self, job):
+        try:
+            completed_process = job.result()
+            return (completed_process.stdout, completed_process.stderr, None)
         except subprocess.TimeoutExpired as e:
-            st.error(f"{e.timeout}s timeout expired!")
+            return (None, None, f"{e.timeout}s timeout expired!")
         except Exception as e:
-            st.error(e)
+            return (None, None, str(e))
+
+def _run_python(code, cwd, session_id):
+    with Metrics.instance().span("python_runner.run"):
+        return PythonPool.instance().run(code, cwd, PYTHON_TIMEOUT, session_id)
+
+PYTHON_TIMEOUT=5
@@ -0,0 +1,70 @@
+import os
+import requests
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from interactive_zserio.logger import Logger
+from interactive_zserio.metrics import Metrics
+
+class RTDBClient:
+    def __init__(self, url, auth_token):
+        self._url = url
+        self._auth_token = auth_token
+
+        # RTDB writes are idempotent (PUT/PATCH of whole values), thus all methods can be retried
+        retry = Retry(total=RETRIES, backoff_factor=RETRY_BACKOFF, status_forcelist=RETRY_STATUSES,
+                      allowed_methods=["GET", "PUT", "PATCH", "DELETE"], raise_on_status=False)
+        adapter = HTTPAdapter(pool_maxsize=POOL_SIZE, max_retries=retry)
+        self._session = requests.Session()
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self._executor = ThreadPoolExecutor(POOL_SIZE, thread_name_prefix="rtdb_client")
+
+    @staticmethod
+    def instance():
+        global _rtdb_client
+        with _rtdb_client_lock:
+            if _rtdb_client is None:
+                _rtdb_client = RTDBClient(FIREBASE_RTDB, os.getenv("AUTH_TOKEN"))
+            return _rtdb_client
+
+    def get(self, path, params=None):
+        return self._request("GET", path, params)
+
+    def put(self, path, data):
+        return self._request("PUT", path, None, data)
+
+    def patch(self, path, data):
+        return self._request("PATCH", path, None, data)
+
+    def submit(self, method, *args):
+        # runs the request in background, independent requests can run concurrently
+        return self._executor.submit(method, *args)
+
+    def _request(self, method, path, params, data=None):
+        params = dict(params) if params is not None else {}
+        params["auth"] = self._auth_token
+        try:
+            with Metrics.instance().span("rtdb." + method.lower()):
+                return self._session.request(method, self._url + path + ".json", params=params, json=data,
+                                             timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+        except requests.RequestException as e:
+            # the exception message contains the whole url including the auth token
+            Logger.warning("rtdb_client:", method, path, "failed:", type(e).__name__)
+            return None
+
+FIREBASE_RTDB=os.getenv("INTERACTIVE_ZSERIO_RTDB_URL",
+                        "https://interactive-zserio-default-rtdb.europe-west1.firebasedatabase.app/")
+POOL_SIZE=8
+CONNECT_TIMEOUT=5
+READ_TIMEOUT=15
+RETRIES=3
+RETRY_BACKOFF=0.5
+RETRY_STATUSES=[429, 500, 502, 503, 504]
+
+_rtdb_client = None
+_rtdb_client_lock = threading.Lock()
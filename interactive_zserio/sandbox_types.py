@@ -0,0 +1,33 @@
+# shared by the sandboxes, the caller puts this code in front of the sandbox code which runs with the generated
+# python sources as the working directory, thus it can use only the standard library and the zserio runtime
+import enum
+import importlib
+import inspect
+import os
+
+def list_compounds(accept=None):
+    # compounds which can be read without arguments, i.e. structures and unions without parameters
+    compounds = []
+    for root, dirs, files in os.walk("."):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.endswith(".py") or name in ("api.py", "__init__.py"):
+                continue
+            module_name = os.path.relpath(os.path.join(root, name[:-3]), ".").replace(os.sep, ".")
+            try:
+                module = importlib.import_module(module_name)
+            except Exception:
+                continue
+            package_name = module_name.rpartition(".")[0]
+            for py_type in vars(module).values():
+                if (isinstance(py_type, type) and py_type.__module__ == module_name and is_compound_type(py_type)
+                        and len(inspect.signature(py_type.from_reader).parameters) == 1
+                        and (accept is None or accept(py_type))):
+                    compounds.append({"name": f"{package_name}.{py_type.__name__}" if package_name
+                                              else py_type.__name__,
+                                      "module": module_name, "class": py_type.__name__})
+    return compounds
+
+def is_compound_type(py_type):
+    return (hasattr(py_type, "from_reader") and not issubclass(py_type, enum.Enum) and
+            not hasattr(py_type, "from_value"))
@@ -0,0 +1,175 @@
+import os
+import threading
+import time
+
+from collections import OrderedDict, deque
+
+from interactive_zserio.logger import Logger
+
+class Job:
+    def __init__(self, scheduler, session_id, key, func, args):
+        self._scheduler = scheduler
+        self.session_id = session_id
+        # sessions waiting for the job, more of them when the job is coalesced
+        self.session_ids = {session_id}
+        self.key = key
+        self._func = func
+        self._args = args
+        self._done = threading.Event()
+        self._result = None
+        self._exception = None
+        self.submitted = time.monotonic()
+        self.started = None
+
+    @property
+    def position(self):
+        return self._scheduler.position(self)
+
+    def done(self):
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise TimeoutError("job not finished")
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def _run(self):
+        try:
+            self._result = self._func(*self._args)
+        except Exception as e:
+            self._exception = e
+        self._done.set()
+
+class Scheduler:
+    def __init__(self, max_jobs):
+        self._condition = threading.Condition()
+        self._queues = OrderedDict()
+        self._pending = {}
+        self._running = 0
+        self._completed = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._session_times = {}
+        self._session_jobs = {}
+
+        for i in range(max_jobs):
+            threading.Thread(target=self._worker, name=f"scheduler_{i}", daemon=True).start()
+
+    @staticmethod
+    def instance():
+        global _scheduler
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = Scheduler(MAX_JOBS)
+            return _scheduler
+
+    def submit(self, session_id, key, func, *args):
+        with self._condition:
+            if key is not None and key in self._pending:
+                Logger.log("scheduler:", "coalescing job:", key)
+                job = self._pending[key]
+                if session_id not in job.session_ids:
+                    job.session_ids.add(session_id)
+                    self._session_jobs[session_id] = self._session_jobs.get(session_id, 0) + 1
+                return job
+
+            job = Job(self, session_id, key, func, args)
+            if key is not None:
+                self._pending[key] = job
+            self._queues.setdefault(session_id, deque()).append(job)
+            self._session_jobs[session_id] = self._session_jobs.get(session_id, 0) + 1
+            self._condition.notify()
+            return job
+
+    def position(self, job):
+        with self._condition:
+            if job.started is not None or job.session_id not in self._queues:
+                return None
+            session_queue = self._queues[job.session_id]
+            if job not in session_queue:
+                return None
+
+            # sessions are served round-robin, each of them in FIFO order
+            index = session_queue.index(job)
+            position = 1
+            before = True
+            for session_id, other_queue in self._queues.items():
+                if session_id == job.session_id:
+                    before = False
+                    position += index
+                else:
+                    position += min(len(other_queue), index + 1 if before else index)
+            return position
+
+    @property
+    def stats(self):
+        with self._condition:
+            return {
+                "queue_depth": sum(len(session_queue) for session_queue in self._queues.values()),
+                "running": self._running,
+                "completed": self._completed,
+                "avg_wait_time": self._total_wait_time / self._completed if self._completed else 0.0,
+                "max_wait_time": self._max_wait_time
+            }
+
+    def session_time(self, session_id):
+        # wall time spent by the workers on jobs of the session, including waiting for the pools and the I/O
+        with self._condition:
+            return self._session_times.get(session_id, 0.0)
+
+    def session_jobs(self, session_id):
+        # queued and running jobs which the session waits for
+        with self._condition:
+            return self._session_jobs.get(session_id, 0)
+
+    @staticmethod
+    def current_session_id():
+        # session which submitted the job running in the current thread, None outside of the jobs
+        return getattr(_current_job, "session_id", None)
+
+    def forget_session(self, session_id):
+        with self._condition:
+            self._session_times.pop(session_id, None)
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while not self._queues:
+                    self._condition.wait()
+                session_id, session_queue = self._queues.popitem(last=False)
+                job = session_queue.popleft()
+                if session_queue:
+                    # move the session to the end to serve other sessions first
+                    self._queues[session_id] = session_queue
+                job.started = time.monotonic()
+                self._running += 1
+
+            _current_job.session_id = job.session_id
+            job._run()
+            _current_job.session_id = None
+            run_time = time.monotonic() - job.started
+
+            with self._condition:
+                if job.key is not None and self._pending.get(job.key) is job:
+                    del self._pending[job.key]
+                wait_time = job.started - job.submitted
+                self._running -= 1
+                self._completed += 1
+                self._total_wait_time += wait_time
+                self._max_wait_time = max(self._max_wait_time, wait_time)
+                self._session_times[job.session_id] = self._session_times.get(job.session_id, 0.0) + run_time
+                for session_id in job.session_ids:
+                    self._session_jobs[session_id] -= 1
+                    if not self._session_jobs[session_id]:
+                        del self._session_jobs[session_id]
+
+            if Logger.enabled(Logger.DEBUG):
+                Logger.debug("scheduler:", "job finished:", job.key, "waited:", wait_time, self.stats)
+
+MAX_JOBS=int(os.getenv("INTERACTIVE_ZSERIO_MAX_JOBS", "4"))
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+_current_job = threading.local()
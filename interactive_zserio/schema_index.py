@@ -0,0 +1,90 @@
+import hashlib
+import os
+import re
+
+class SchemaFile:
+    def __init__(self, stat_key, digest, imports):
+        self.stat_key = stat_key
+        self.digest = digest
+        self.imports = imports
+
+class SchemaIndex:
+    def __init__(self, zs_dir):
+        self._zs_dir = zs_dir
+        self._files = {}
+
+    def digest(self, zs_file_path):
+        hasher = hashlib.sha256()
+        for path, schema_file in sorted(self.closure(zs_file_path).items()):
+            hasher.update(path.encode() + b"\0")
+            hasher.update(schema_file.digest if schema_file is not None else b"missing")
+        return hasher.hexdigest()
+
+    def closure(self, zs_file_path):
+        closure = {}
+        pending = [os.path.normpath(zs_file_path)]
+        while pending:
+            path = pending.pop()
+            if path in closure:
+                continue
+
+            schema_file = self._get(path)
+            closure[path] = schema_file
+            if schema_file is None:
+                continue
+
+            for imported in schema_file.imports:
+                pending.extend(self._resolve(imported))
+
+        return closure
+
+    def update(self, zs_file_path, content, content_hash=None):
+        # allows writers which already have the content (and its hash) to skip re-reading of the file
+        path = os.path.normpath(zs_file_path)
+        try:
+            stat_key = self._stat_key(path)
+        except OSError:
+            self._files.pop(path, None)
+            return
+        self._files[path] = self._parse(stat_key, content.encode(),
+                                        bytes.fromhex(content_hash) if content_hash is not None else None)
+
+    def _get(self, path):
+        try:
+            stat_key = self._stat_key(path)
+        except OSError:
+            self._files.pop(path, None)
+            return None
+
+        schema_file = self._files.get(path)
+        if schema_file is None or schema_file.stat_key != stat_key:
+            with open(os.path.join(self._zs_dir, path), "rb") as f:
+                schema_file = self._parse(stat_key, f.read())
+            self._files[path] = schema_file
+
+        return schema_file
+
+    def _stat_key(self, path):
+        stat = os.stat(os.path.join(self._zs_dir, path))
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _resolve(self, imported):
+        # "import a.b.Symbol;" or "import a.b.*;" both import from the package a.b, i.e. from a/b.zs
+        components = imported.split(".")
+        candidates = [components[:-1]]
+        if components[-1] != "*":
+            # be tolerant to imports of whole packages without the wildcard
+            candidates.append(components)
+
+        return [os.path.join(*candidate) + ".zs" for candidate in candidates if candidate]
+
+    @staticmethod
+    def _parse(stat_key, content, digest=None):
+        text = COMMENT_PATTERN.sub(" ", content.decode("utf-8", errors="replace"))
+        return SchemaFile(stat_key, digest if digest is not None else hashlib.sha256(content).digest(),
+                          [WHITESPACE_PATTERN.sub("", imported) for imported in IMPORT_PATTERN.findall(text)])
+
+COMMENT_PATTERN=re.compile(r"//[^\n]*|/\*.*?\*/", re.DOTALL)
+# whitespace is allowed also around the dots, e.g. when an import is split across lines
+IMPORT_PATTERN=re.compile(r"\bimport\s+(\w+(?:\s*\.\s*(?:\w+|\*))*)\s*;")
+WHITESPACE_PATTERN=re.compile(r"\s+")
@@ -0,0 +1,197 @@
+import json
+import os
+import streamlit as st
+import subprocess
+
+from interactive_zserio.widget import Widget, timed
+from interactive_zserio.compile_cache import CompileCache
+from interactive_zserio.compile_service import CompileService
+from interactive_zserio.scheduler import Scheduler
+from interactive_zserio.python_pool import PythonPool
+from interactive_zserio.metrics import Metrics
+from interactive_zserio.serialization_sandbox import RESPONSE_MARKER
+
+class SerializationBench(Widget):
+    def __init__(self, bench_dir, zs_dir, generator):
+        super().__init__("serialization_bench")
+        # sources with type info are generated separately, the python runner uses the user's settings
+        self._bench_dir = bench_dir
+        self._zs_dir = zs_dir
+        self._generator = generator
+
+        self._python_generated = None
+
+    def set_python_generated(self, python_generated):
+        self._python_generated = python_generated
+
+    @timed
+    def render(self):
+        self._log("render")
+
+        st.checkbox("Serialization benchmark", key=self._key("check"), disabled=(not self._python_generated),
+                    help="Measures encoded size and write/read speed of random instances, "
+                         "python generator must be enabled")
+        if not st.session_state[self._key("check")] or not self._python_generated:
+            return
+
+        digest = self._compile()
+        if digest is None:
+            return
+
+        compounds = self._list_compounds(digest)
+        if compounds is None:
+            return
+        if not compounds:
+            st.info("No structure or union without parameters found in the schema.")
+            return
+
+        names = [compound["name"] for compound in compounds]
+        cols = st.columns([5, 2, 2])
+        name = cols[0].selectbox("Compound", names, key=self._key("compound"))
+        count = cols[1].number_input("Instances", min_value=1, max_value=MAX_INSTANCES, value=DEFAULT_INSTANCES,
+                                     step=100, key=self._key("instances"))
+        cols[2].title("")
+        run = cols[2].button("Run benchmark", key=self._key("run"),
+                             help=f"Random instances are synthesized with a fixed seed, the run is limited to "
+                                  f"{BENCH_BUDGET}s.")
+
+        results = st.session_state.setdefault(self._key("results"), {})
+        if run:
+            compound = compounds[names.index(name)]
+            result = self._run({"command": "run", "module": compound["module"], "class": compound["class"],
+                                "count": count, "seed": SEED, "budget": BENCH_BUDGET})
+            if result is not None:
+                previous = results.get(name)
+                if previous is not None and previous["digest"] != digest:
+                    # compare with the last run on a different compilation of the schema
+                    results[name] = {"digest": digest, "result": result, "previous": previous["result"]}
+                else:
+                    results[name] = {"digest": digest, "result": result,
+                                     "previous": previous["previous"] if previous is not None else None}
+
+        if name in results:
+            self._display(results[name])
+
+    def _compile(self):
+        zs_file_path = self._generator.zs_file_path
+        extra_args = self._generator.extra_args or ""
+        if "-withTypeInfoCode" not in extra_args.split():
+            extra_args = (extra_args + " -withTypeInfoCode").strip()
+
+        schema_digest = self._generator.schema_index.digest(zs_file_path)
+        digest = CompileCache.make_key(schema_digest, zs_file_path, extra_args, "python")
+        if (st.session_state.get(self._key("digest")) == digest and
+                os.path.isdir(os.path.join(self._bench_dir, "python"))):
+            return digest
+
+        compile_service = CompileService(self._zs_dir, self._bench_dir, self._generator.schema_index)
+        with st.spinner("Compiling with type info..."):
+            results = compile_service.compile(zs_file_path, extra_args, ["python"], schema_digest,
+                                              submit=self._submit, wait=self._wait_for)
+        if not results[0].success:
+            st.error(results[0].completed_process.stderr.replace("\n", "  \n"))
+            return None
+
+        st.session_state[self._key("digest")] = digest
+        return digest
+
+    def _list_compounds(self, digest):
+        compounds = st.session_state.get(self._key("compounds"))
+        if compounds is not None and compounds[0] == digest:
+            return compounds[1]
+
+        compounds = self._run({"command": "list"})
+        if compounds is not None:
+            st.session_state[self._key("compounds")] = (digest, compounds)
+        return compounds
+
+    def _run(self, request):
+        job = Scheduler.instance().submit(self._session_id, None, _run_sandbox, request,
+                                          os.path.join(self._bench_dir, "python"), self._session_id)
+        self._wait_for([job])
+        try:
+            completed_process = job.result()
+        except subprocess.TimeoutExpired as e:
+            st.error(f"{e.timeout}s timeout expired!")
+            return None
+        except Exception as e:
+            st.error(str(e))
+            return None
+
+        for line in completed_process.stdout.splitlines():
+            if line.startswith(RESPONSE_MARKER):
+                return json.loads(line[len(RESPONSE_MARKER):])
+        st.error(completed_process.stderr or "Serialization benchmark failed")
+        return None
+
+    def _display(self, results):
+        result = results["result"]
+        previous = results["previous"]
+        st.caption(f"{result['instances']} of {result['attempts']} synthesized instances are valid" +
+                   (", compared with the previous compilation" if previous is not None else ""))
+        for error, count in result["errors"]:
+            st.caption(f"{count}x rejected: {error}")
+        if not result["instances"]:
+            return
+
+        rows = []
+        for label, path in ROWS:
+            value = _get(result, path)
+            row = {"": label, "current": _format(value)}
+            if previous is not None:
+                previous_value = _get(previous, path)
+                row["previous"] = _format(previous_value)
+                row["change"] = (f"{(value - previous_value) / previous_value * 100:+.1f} %"
+                                 if value is not None and previous_value else "")
+            rows.append(row)
+        st.table(rows)
+
+    def _submit(self, key, func, *args):
+        return Scheduler.instance().submit(self._session_id, key, func, *args)
+
+def _run_sandbox(request, cwd, session_id):
+    with Metrics.instance().span("serialization_bench.run"):
+        return PythonPool.instance().run(f"REQUEST = {request!r}\n" + _get_sandbox_code(), cwd,
+                                         BENCH_BUDGET + BENCH_TIMEOUT_MARGIN, session_id)
+
+def _get_sandbox_code():
+    global _sandbox_code
+    if _sandbox_code is None:
+        _sandbox_code = ""
+        for name in ("sandbox_types.py", "serialization_sandbox.py"):
+            with open(os.path.join(os.path.dirname(__file__), name)) as f:
+                _sandbox_code += f.read() + "\n"
+    return _sandbox_code
+
+def _get(result, path):
+    value = result
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+def _format(value):
+    if value is None:
+        return ""
+    return f"{value:,.0f}" if value >= 100 else f"{value:.2f}"
+
+ROWS=[
+    ("Size mean [bytes]", ("bytes", "mean")),
+    ("Size p50 [bytes]", ("bytes", "p50")),
+    ("Size p95 [bytes]", ("bytes", "p95")),
+    ("Size max [bytes]", ("bytes", "max")),
+    ("bitsizeof mean [bits]", ("bits", "mean")),
+    ("write [objects/s]", ("write", "per_second")),
+    ("write [MB/s]", ("write", "mb_per_second")),
+    ("from_reader [objects/s]", ("read", "per_second")),
+    ("from_reader [MB/s]", ("read", "mb_per_second")),
+    ("bitsizeof [objects/s]", ("bitsizeof", "per_second")),
+]
+DEFAULT_INSTANCES=1000
+MAX_INSTANCES=100000
+SEED=0
+BENCH_BUDGET=10
+BENCH_TIMEOUT_MARGIN=5
+
+_sandbox_code = None
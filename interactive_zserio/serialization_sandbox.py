@@ -0,0 +1,264 @@
+# executed in the python sandbox with the generated sources as the working directory,
+# thus it can use only the standard library and the zserio runtime,
+# list_compounds is defined by the caller in front of this code (sandbox_types.py)
+import importlib
+import json
+import random
+import statistics
+import struct
+import sys
+import time
+import zserio
+
+from zserio.typeinfo import TypeAttribute, MemberAttribute
+
+class SynthesisError(Exception):
+    pass
+
+class Synthesizer:
+    # creates random instances of a compound described by the type info
+    def __init__(self, rng):
+        self._rng = rng
+
+    def create(self, type_info, args=(), depth=0):
+        if depth > MAX_DEPTH:
+            raise SynthesisError("too deeply nested")
+        instance = type_info.py_type(*args)
+        fields = type_info.attributes[TypeAttribute.FIELDS]
+        if TypeAttribute.SELECTOR in type_info.attributes:
+            selector = type_info.attributes[TypeAttribute.SELECTOR]
+            if selector is None:
+                # union, any of the fields
+                if fields:
+                    self._set_field(instance, self._rng.choice(fields), depth)
+            else:
+                field = self._choose_case(type_info.attributes[TypeAttribute.CASES], selector(instance))
+                if field is not None:
+                    self._set_field(instance, field, depth)
+        else:
+            for field in fields:
+                if MemberAttribute.OPTIONAL in field.attributes:
+                    condition = field.attributes[MemberAttribute.OPTIONAL]
+                    used = (condition(instance) if condition is not None
+                            else depth < MAX_DEPTH and self._rng.random() < OPTIONAL_PROBABILITY)
+                    if not used:
+                        continue
+                self._set_field(instance, field, depth)
+        return instance
+
+    def _choose_case(self, cases, selector):
+        default = None
+        for case in cases:
+            if not case.case_expressions:
+                default = case
+            elif any(expression() == selector for expression in case.case_expressions):
+                return case.field
+        if default is None:
+            raise SynthesisError("no choice case matches the selector")
+        return default.field
+
+    def _set_field(self, instance, field, depth):
+        name = field.attributes[MemberAttribute.PROPERTY_NAME]
+        constraint = field.attributes.get(MemberAttribute.CONSTRAINT)
+        for _ in range(CONSTRAINT_ATTEMPTS):
+            setattr(instance, name, self._field_value(instance, field, depth))
+            if constraint is None or constraint(instance):
+                return
+        raise SynthesisError(f"constraint of '{field.schema_name}' not satisfied")
+
+    def _field_value(self, instance, field, depth):
+        if MemberAttribute.ARRAY_LENGTH in field.attributes:
+            length_expression = field.attributes[MemberAttribute.ARRAY_LENGTH]
+            if length_expression is not None:
+                length = length_expression(instance)
+                if length > MAX_ARRAY_LENGTH:
+                    raise SynthesisError(f"array '{field.schema_name}' too long")
+            else:
+                length = self._rng.randint(0, MAX_ARRAY_LENGTH if depth < MAX_DEPTH else 0)
+            return [self._value(instance, field, depth, index) for index in range(length)]
+        return self._value(instance, field, depth, None)
+
+    def _value(self, parent, field, depth, index):
+        type_info = field.type_info
+        args = [argument(parent, index) for argument in field.attributes.get(MemberAttribute.TYPE_ARGUMENTS, [])]
+        if TypeAttribute.FIELDS in type_info.attributes:
+            return self.create(type_info, args, depth + 1)
+        return self._simple_value(type_info, args)
+
+    def _simple_value(self, type_info, args):
+        attributes = type_info.attributes
+        if TypeAttribute.ENUM_ITEMS in attributes:
+            return self._rng.choice([item.py_item for item in attributes[TypeAttribute.ENUM_ITEMS]
+                                     if not item.is_removed])
+        if TypeAttribute.BITMASK_VALUES in attributes:
+            value = 0
+            for item in attributes[TypeAttribute.BITMASK_VALUES]:
+                if self._rng.random() < 0.5:
+                    value |= item.py_item.value
+            return type_info.py_type.from_value(value)
+
+        schema_name = type_info.schema_name
+        if schema_name == "bool":
+            return self._rng.random() < 0.5
+        if schema_name == "string":
+            return "".join(self._rng.choice(STRING_CHARACTERS) for _ in range(self._magnitude(MAX_STRING_BITS)))
+        if schema_name == "bytes":
+            return bytearray(self._rng.getrandbits(8) for _ in range(self._magnitude(MAX_STRING_BITS)))
+        if schema_name == "extern":
+            bitsize = self._magnitude(MAX_STRING_BITS + 3)
+            return zserio.BitBuffer(bytes(self._rng.getrandbits(8) for _ in range((bitsize + 7) // 8)), bitsize)
+        if schema_name in FLOAT_FORMATS:
+            # rounded to the precision of the type, thus the value survives a round trip
+            return struct.unpack(FLOAT_FORMATS[schema_name],
+                                 struct.pack(FLOAT_FORMATS[schema_name], self._rng.uniform(-MAX_FLOAT, MAX_FLOAT)))[0]
+
+        signed, bits = _integer_range(schema_name, args)
+        if signed:
+            # the sign bit doesn't count to the magnitude
+            value = self._magnitude(bits - 1)
+            return -value - 1 if self._rng.random() < 0.5 else value
+        return self._magnitude(bits)
+
+    def _magnitude(self, bits):
+        # number of significant bits is uniform, thus both small and large values are generated
+        significant_bits = self._rng.randint(0, bits)
+        if significant_bits == 0:
+            return 0
+        return self._rng.getrandbits(significant_bits - 1) | (1 << (significant_bits - 1))
+
+def _integer_range(schema_name, args):
+    if schema_name in VARIABLE_INTEGERS:
+        return VARIABLE_INTEGERS[schema_name]
+    signed = schema_name.startswith("int")
+    if ":" in schema_name:
+        bits = int(schema_name.split(":")[1])
+    elif schema_name in ("bit", "int"):
+        # dynamic bit field, e.g. bit<width>
+        bits = args[0] if args else 0
+        if not 0 < bits <= 64:
+            raise SynthesisError(f"invalid length of dynamic bit field: {bits}")
+    elif schema_name.startswith(("uint", "int")):
+        bits = int(schema_name.removeprefix("u").removeprefix("int"))
+    else:
+        raise SynthesisError(f"unsupported type '{schema_name}'")
+    return signed, bits
+
+def _has_type_info(py_type):
+    # the synthesis is driven by the type info, choices have parameters thus they are never listed
+    return hasattr(py_type, "type_info")
+
+def run(module_name, class_name, count, seed, budget):
+    deadline = time.perf_counter() + budget
+    py_type = getattr(importlib.import_module(module_name), class_name)
+    synthesizer = Synthesizer(random.Random(seed))
+
+    instances = []
+    errors = {}
+    attempts = 0
+    # at most a third of the budget is spent by the synthesis
+    synthesis_deadline = time.perf_counter() + budget / 3
+    while len(instances) < count and attempts < count * MAX_ATTEMPTS_FACTOR:
+        if time.perf_counter() > synthesis_deadline:
+            break
+        attempts += 1
+        try:
+            instance = synthesizer.create(py_type.type_info())
+            data = zserio.serialize_to_bytes(instance)
+        except (SynthesisError, zserio.PythonRuntimeException, ValueError, TypeError, OverflowError,
+                RecursionError) as e:
+            message = str(e) or type(e).__name__
+            errors[message] = errors.get(message, 0) + 1
+            continue
+        instances.append((instance, data, instance.bitsizeof()))
+
+    result = {
+        "attempts": attempts,
+        "instances": len(instances),
+        "errors": sorted(errors.items(), key=lambda error: -error[1])[:MAX_ERRORS]
+    }
+    if not instances:
+        return result
+
+    bit_sizes = [bit_size for _, _, bit_size in instances]
+    byte_sizes = [len(data) for _, data, _ in instances]
+    total_bytes = sum(byte_sizes)
+    result["bits"] = _distribution(bit_sizes)
+    result["bytes"] = _distribution(byte_sizes)
+
+    def write():
+        for instance, _, _ in instances:
+            instance.write(zserio.BitStreamWriter())
+
+    def read():
+        for _, data, bit_size in instances:
+            py_type.from_reader(zserio.BitStreamReader(data, bit_size))
+
+    def bitsizeof():
+        for instance, _, _ in instances:
+            instance.bitsizeof()
+
+    operations = [("write", write), ("read", read), ("bitsizeof", bitsizeof)]
+    for i, (name, operation) in enumerate(operations):
+        # remaining budget is split among the operations, each operation runs at least once
+        operation_deadline = time.perf_counter() + (deadline - time.perf_counter()) / (len(operations) - i)
+        passes = 0
+        start = time.perf_counter()
+        while True:
+            operation()
+            passes += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= MIN_MEASURE_TIME or time.perf_counter() + elapsed / passes > operation_deadline:
+                break
+        result[name] = {
+            "per_second": passes * len(instances) / elapsed,
+            "mb_per_second": passes * total_bytes / elapsed / 1e6
+        }
+    return result
+
+def _distribution(values):
+    values = sorted(values)
+    return {
+        "min": values[0],
+        "mean": statistics.fmean(values),
+        "p50": values[len(values) // 2],
+        "p95": values[min(len(values) - 1, len(values) * 95 // 100)],
+        "max": values[-1]
+    }
+
+def main(request):
+    if request["command"] == "list":
+        response = list_compounds(_has_type_info)
+    else:
+        response = run(request["module"], request["class"], request["count"], request["seed"], request["budget"])
+    sys.stdout.write(RESPONSE_MARKER + json.dumps(response) + "\n")
+
+MAX_DEPTH=8
+MAX_ARRAY_LENGTH=16
+MAX_STRING_BITS=5
+MAX_FLOAT=1e4
+MAX_ATTEMPTS_FACTOR=4
+MAX_ERRORS=3
+OPTIONAL_PROBABILITY=0.5
+CONSTRAINT_ATTEMPTS=10
+MIN_MEASURE_TIME=0.5
+FLOAT_FORMATS={
+    "float16": "<e",
+    "float32": "<f",
+    "float64": "<d"
+}
+STRING_CHARACTERS="abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 "
+VARIABLE_INTEGERS={
+    "varint16": (True, 15),
+    "varint32": (True, 29),
+    "varint64": (True, 57),
+    "varint": (True, 64),
+    "varuint16": (False, 15),
+    "varuint32": (False, 29),
+    "varuint64": (False, 57),
+    "varuint": (False, 64),
+    "varsize": (False, 31),
+}
+RESPONSE_MARKER="serialization_sandbox:"
+
+if __name__ == "__main__":
+    main(REQUEST) # defined by the caller in front of this code
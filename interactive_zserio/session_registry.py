@@ -0,0 +1,183 @@
+import os
+import shutil
+import threading
+import time
+import zlib
+
+from interactive_zserio.logger import Logger
+from interactive_zserio.metrics import Metrics
+from interactive_zserio.scheduler import Scheduler
+from interactive_zserio.python_pool import CPU_TIME_METRIC as PYTHON_CPU_TIME_METRIC
+from interactive_zserio.compiler_pool import CPU_TIME_METRIC as COMPILER_CPU_TIME_METRIC
+from interactive_zserio.workspace import Workspace
+
+class SessionInfo:
+    def __init__(self, session_id, session_dir, ws_dir):
+        self.session_id = session_id
+        self.session_dir = session_dir
+        self.ws_dir = ws_dir
+        self.last_activity = time.monotonic()
+        self.disk_usage = 0
+        self.snapshot = None
+        self.flush_callback = None
+
+    @property
+    def evicted(self):
+        return self.snapshot is not None
+
+class SessionRegistry:
+    def __init__(self, idle_timeout, disk_budget):
+        self._idle_timeout = idle_timeout
+        self._disk_budget = disk_budget
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._last_eviction = None
+
+    @staticmethod
+    def instance():
+        global _session_registry
+        with _session_registry_lock:
+            if _session_registry is None:
+                _session_registry = SessionRegistry(IDLE_TIMEOUT, DISK_BUDGET)
+            return _session_registry
+
+    def activate(self, session_id, session_dir, ws_dir, flush_callback=None):
+        # returns files of the evicted workspace which needs to be restored, None otherwise,
+        # flush_callback writes edits of the session which are not written yet, it's called before the eviction
+        snapshot = None
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = SessionInfo(session_id, session_dir, ws_dir)
+                self._sessions[session_id] = session
+            session.last_activity = time.monotonic()
+            session.flush_callback = flush_callback
+            if session.evicted:
+                snapshot = session.snapshot
+                session.snapshot = None
+
+        self._schedule_eviction()
+
+        if snapshot is None:
+            return None
+        return [(path, [zlib.decompress(data)]) for path, data in snapshot]
+
+    @property
+    def stats(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+        now = time.monotonic()
+        scheduler = Scheduler.instance()
+        metrics = Metrics.instance()
+        session_metrics = {session.session_id: metrics.snapshot(session.session_id) for session in sessions}
+        return {
+            "sessions": len(sessions),
+            "evicted": sum(1 for session in sessions if session.evicted),
+            "disk_usage": sum(session.disk_usage for session in sessions),
+            "per_session": [{
+                "session_id": session.session_id,
+                "idle_time": now - session.last_activity,
+                "disk_usage": session.disk_usage,
+                "worker_time": scheduler.session_time(session.session_id),
+                # CPU time of the python runs and of the warm compilations
+                "cpu_time": sum(session_metrics[session.session_id].get(metric, {}).get("total", 0.0)
+                                for metric in (PYTHON_CPU_TIME_METRIC, COMPILER_CPU_TIME_METRIC)),
+                "evicted": session.evicted
+            } for session in sessions]
+        }
+
+    def evict(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+
+        now = time.monotonic()
+        active = []
+        for session in sessions:
+            if not os.path.isdir(session.session_dir):
+                # the session has ended and its temporary directory has been removed
+                self._forget(session)
+            elif not session.evicted:
+                session.disk_usage = _disk_usage(session.session_dir)
+                if now - session.last_activity > self._idle_timeout:
+                    self._evict(session, self._idle_timeout, "idle")
+                else:
+                    active.append(session)
+
+        # least recently active sessions are evicted first when the disk budget is exceeded
+        disk_usage = sum(session.disk_usage for session in active)
+        for session in sorted(active, key=lambda session: session.last_activity):
+            if disk_usage <= self._disk_budget:
+                break
+            if now - session.last_activity < MIN_IDLE_TIME:
+                continue
+            evicted_usage = session.disk_usage
+            if self._evict(session, MIN_IDLE_TIME, "disk budget exceeded"):
+                disk_usage -= evicted_usage
+
+    def _evict(self, session, min_idle_time, reason):
+        with self._lock:
+            # the session could be activated meanwhile
+            if time.monotonic() - session.last_activity < min_idle_time or session.evicted:
+                return False
+            if Scheduler.instance().session_jobs(session.session_id):
+                # jobs of the session still use its workspace
+                Logger.log("session_registry:", "not evicting session with jobs:", session.session_id)
+                return False
+
+            if session.flush_callback is not None:
+                try:
+                    session.flush_callback()
+                except Exception as e:
+                    # the edits would be lost with the workspace
+                    Logger.warning("session_registry:", "not evicting session, flush failed:", session.session_id, e)
+                    return False
+
+            Logger.info("session_registry:", "evicting:", session.session_id, reason, session.disk_usage)
+            # only sources are kept, everything else can be regenerated
+            workspace_snapshot = Workspace(session.ws_dir).snapshot()
+            session.snapshot = [(path, zlib.compress(b"".join(workspace_snapshot.read_chunks(path))))
+                                for path in workspace_snapshot.files]
+            for name in os.listdir(session.session_dir):
+                path = os.path.join(session.session_dir, name)
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            session.disk_usage = 0
+            return True
+
+    def _forget(self, session):
+        Logger.log("session_registry:", "forgetting:", session.session_id)
+        with self._lock:
+            self._sessions.pop(session.session_id, None)
+        Scheduler.instance().forget_session(session.session_id)
+        Metrics.instance().forget_session(session.session_id)
+
+    def _schedule_eviction(self):
+        # eviction runs in background at most once per interval
+        with self._lock:
+            if self._last_eviction is not None and time.monotonic() - self._last_eviction < EVICTION_INTERVAL:
+                return
+            self._last_eviction = time.monotonic()
+        threading.Thread(target=self.evict, name="session_eviction", daemon=True).start()
+
+def _disk_usage(folder):
+    disk_usage = 0
+    for root, _, files in os.walk(folder):
+        for name in files:
+            try:
+                disk_usage += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return disk_usage
+
+IDLE_TIMEOUT=int(os.getenv("INTERACTIVE_ZSERIO_IDLE_TIMEOUT", "1800"))
+DISK_BUDGET=int(os.getenv("INTERACTIVE_ZSERIO_DISK_BUDGET_MB", "2048")) * 1024 * 1024
+EVICTION_INTERVAL=60
+MIN_IDLE_TIME=60
+
+_session_registry = None
+_session_registry_lock = threading.Lock()
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from interactive_zserio.widget import Widget
+from interactive_zserio.share_storage import ShareStorage
+from interactive_zserio.ttl_cache import TTLCache
+
+class Share(Widget):
+    def __init__(self, workspace, generator, python_runner):
+        super().__init__("share")
+        self._workspace = workspace
+        self._generator = generator
+        self._python_runner = python_runner
+
+        _schedule_expiry()
+
+    def restore_sample(self):
+        self._restore_json(_get_sample())
+
+    @staticmethod
+    def new_id():
+        return uuid.uuid1().hex
+
+    def is_owner(self, owner_id, share_id):
+        return ShareStorage.instance().get_owner(share_id) == owner_id
+
+    def restore(self, share_id):
+        self._log("loading shared workspace:", share_id)
+        share_json = _share_cache.get(share_id)
+        if share_json is None:
+            share_json = ShareStorage.instance().load(share_id)
+            if share_json is None:
+                return False
+            _share_cache.put(share_id, share_json)
+        else:
+            self._log("using cached shared workspace:", share_id)
+
+        hashes = []
+        if share_json.get("version") == SHARE_VERSION:
+            hashes = _manifest_hashes(share_json["ws"])
+            share_json = self._unpack(share_json, hashes)
+            if share_json is None:
+                return False
+
+        if self._restore_json(share_json):
+            # nobody waits for the timestamp
+            _background.submit(ShareStorage.instance().touch, share_id, hashes)
+            return True
+        return False
+
+    def share(self, owner_id, share_id):
+        self._log("sharing workspace as:", share_id)
+
+        manifest, blobs = _pack(self._get_json())
+
+        # the share is changed in any case, don't serve the old content even if the update fails
+        _share_cache.pop(share_id)
+
+        if not ShareStorage.instance().save(share_id, owner_id, manifest, blobs):
+            return False
+
+        _share_cache.put(share_id, manifest)
+        for blob_hash, content in blobs.items():
+            _blob_cache.put(blob_hash, content)
+        return True
+
+    def _unpack(self, share_json, hashes):
+        blobs = {}
+        for blob_hash in hashes:
+            content = _blob_cache.get(blob_hash)
+            if content is not None:
+                blobs[blob_hash] = content
+
+        missing = [blob_hash for blob_hash in hashes if blob_hash not in blobs]
+        if missing:
+            loaded = ShareStorage.instance().load_blobs(missing)
+            for blob_hash in missing:
+                content = loaded.get(blob_hash)
+                if content is None or _hash_blob(content) != blob_hash:
+                    self._log("missing or corrupted shared blob:", blob_hash)
+                    return None
+                blobs[blob_hash] = content
+                _blob_cache.put(blob_hash, content)
+
+        return _unpack(share_json, blobs)
+
+    def _restore_json(self, shared_json):
+        try:
+            ws_json = shared_json["ws"]
+            if not self._workspace.load_json(ws_json):
+                return False
+            self._generator.set_state(shared_json["generator"])
+            self._python_runner.check = shared_json["python_runner"]
+            return True
+        except Exception as e:
+            self._log("failed to parse shared json:", type(e), e)
+        return False
+
+    def _get_json(self):
+        return {
+            "ws": self._workspace.get_json(),
+            "generator": self._generator.get_state(),
+            "python_runner": self._python_runner.check
+        }
+
+def _schedule_expiry():
+    # old shares are deleted in background at most once per interval in the server process
+    global _last_expiry
+    with _expiry_lock:
+        if _last_expiry is not None and time.monotonic() - _last_expiry < EXPIRY_INTERVAL:
+            return
+        _last_expiry = time.monotonic()
+    last_used = (datetime.now().date() - timedelta(days=DAYS_LIMIT + 1)).isoformat()
+    _background.submit(ShareStorage.instance().expire, last_used)
+
+def _get_sample():
+    global _sample_json
+    with _sample_json_lock:
+        if _sample_json is None:
+            with open("sample.json") as f:
+                _sample_json = json.loads(f.read())
+        return _sample_json
+
+def _pack(shared_json):
+    # files are replaced by hashes of their content, the content is stored separately as blobs
+    blobs = {}
+    ws_manifest = {"zs": [], "src": {}}
+    for src in shared_json["ws"]["zs"]:
+        ws_manifest["zs"].append({"name": src["name"], "hash": _add_blob(blobs, src["content"])})
+    for lang, srcs in shared_json["ws"]["src"].items():
+        ws_manifest["src"][lang] = [{"name": src["name"], "hash": _add_blob(blobs, src["content"])}
+                                    for src in srcs]
+
+    return dict(shared_json, version=SHARE_VERSION, ws=ws_manifest), blobs
+
+def _unpack(manifest, blobs):
+    ws_json = {"zs": [], "src": {}}
+    for src in manifest["ws"].get("zs", []):
+        ws_json["zs"].append({"name": src["name"], "content": blobs[src["hash"]]})
+    for lang, srcs in manifest["ws"].get("src", {}).items():
+        ws_json["src"][lang] = [{"name": src["name"], "content": blobs[src["hash"]]} for src in srcs]
+
+    shared_json = dict(manifest, ws=ws_json)
+    del shared_json["version"]
+    return shared_json
+
+def _manifest_hashes(ws_manifest):
+    srcs = list(ws_manifest.get("zs", []))
+    for lang_srcs in ws_manifest.get("src", {}).values():
+        srcs += lang_srcs
+    return sorted(set(src["hash"] for src in srcs))
+
+def _add_blob(blobs, content):
+    blob_hash = _hash_blob(content)
+    blobs[blob_hash] = content
+    return blob_hash
+
+def _hash_blob(content):
+    return hashlib.sha256(content.encode()).hexdigest()
+
+DAYS_LIMIT=365
+EXPIRY_INTERVAL=int(os.getenv("INTERACTIVE_ZSERIO_SHARE_EXPIRY_INTERVAL", "3600"))
+SHARE_VERSION=2
+SHARE_CACHE_TTL=int(os.getenv("INTERACTIVE_ZSERIO_SHARE_CACHE_TTL", "300"))
+SHARE_CACHE_ENTRIES=256
+BLOB_CACHE_ENTRIES=4096
+
+_last_expiry = None
+_expiry_lock = threading.Lock()
+_background = ThreadPoolExecutor(2, thread_name_prefix="share")
+_share_cache = TTLCache(SHARE_CACHE_ENTRIES, SHARE_CACHE_TTL)
+# blobs never change, the TTL only limits how long unused content occupies the memory
+_blob_cache = TTLCache(BLOB_CACHE_ENTRIES, SHARE_CACHE_TTL)
+_sample_json = None
+_sample_json_lock = threading.Lock()
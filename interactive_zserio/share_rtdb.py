@@ -1,131 +1,152 @@
-import os
-import requests
-import uuid
+import base64
 import json
+import zlib
 
 from http import HTTPStatus
 from datetime import datetime
 
-from interactive_zserio.widget import Widget
+from interactive_zserio.logger import Logger
+from interactive_zserio.rtdb_client import RTDBClient
+from interactive_zserio.share_storage import ShareStorage
 
-class ShareRTDB(Widget):
-    def __init__(self, workspace, generator, python_runner):
-        super().__init__("share")
-        self._workspace = workspace
-        self._generator = generator
-        self._python_runner = python_runner
-
-    def restore_sample(self):
-        with open("sample.json") as f:
-            self._restore_json(json.loads(f.read()))
-
-    @staticmethod
-    def new_id():
-        return uuid.uuid1().hex
-
-    def is_owner(self, owner_id, share_id):
-        response = requests.get(FIREBASE_RTDB + "user_metadata/" + share_id + ".json",
-                               params={"auth": os.getenv('AUTH_TOKEN')})
-        if response.status_code != HTTPStatus.OK:
-            self._log("failed to get metadata from RTDB:", response.status_code)
-            return False
+class ShareRTDB(ShareStorage):
+    def get_owner(self, share_id):
+        response = RTDBClient.instance().get("user_metadata/" + share_id)
+        if not _succeeded(response):
+            self._log("failed to get metadata from RTDB:", _status(response))
+            return None
 
         share_metadata = response.json()
-        return "owner_id" in share_metadata and owner_id == share_metadata["owner_id"]
+        return share_metadata.get("owner_id") if share_metadata else None
 
-    def restore(self, share_id):
-        self._log("loading shared workspace:", share_id)
-        response = requests.get(FIREBASE_RTDB + "user_workspaces/" + share_id + ".json",
-                                params={"auth": os.getenv('AUTH_TOKEN')})
-        if response.status_code != HTTPStatus.OK:
-            self._log("failed to get shared workspace from RTDB, status:", response.status_code)
-            return False
+    def load(self, share_id):
+        response = RTDBClient.instance().get("user_workspaces/" + share_id)
+        if not _succeeded(response):
+            self._log("failed to get shared workspace from RTDB, status:", _status(response))
+            return None
 
         share_json = response.json()
         if share_json is None:
             self._log("shared workspace does not exists:", share_id)
-            return False
-
-        if self._restore_json(share_json):
-            self._update_last_used(share_id)
-            return True
-        return False
-
-    def share(self, owner_id, share_id):
-        self._log("sharing workspace via RTDB as:", share_id)
-
-        result = requests.put(FIREBASE_RTDB + "user_metadata/" + share_id + ".json",
-                              params={"auth": os.getenv('AUTH_TOKEN')},
-                              json={"created": datetime.now().date().isoformat(),
-                                    "last_used": datetime.now().date().isoformat(),
-                                    "owner_id": owner_id})
-        if result.status_code != HTTPStatus.OK:
-            self._log("sharing workspace via RTDB failed:", result.status_code)
-            return False
-
-        result = requests.put(FIREBASE_RTDB + "user_workspaces/" + share_id + ".json",
-                              params={"auth": os.getenv('AUTH_TOKEN')},
-                              json=self._get_json())
-        if result.status_code != HTTPStatus.OK:
-            self._log("sharing workspace via RTDB failed:", result.status_code)
-            return False
-
-        return True
-
-    def delete_old_shares(self):
-        self._log("deleting old shares")
-        response = requests.get(FIREBASE_RTDB + "user_metadata.json",
-                                params={"auth": os.getenv('AUTH_TOKEN')})
-        if response.status_code == HTTPStatus.OK:
-            dates_json = response.json()
-            if dates_json is None:
+        return share_json
+
+    def load_blobs(self, hashes):
+        rtdb_client = RTDBClient.instance()
+        futures = {blob_hash: rtdb_client.submit(rtdb_client.get, "user_blobs/" + blob_hash) for blob_hash in hashes}
+
+        blobs = {}
+        for blob_hash, future in futures.items():
+            response = future.result()
+            blob = response.json() if _succeeded(response) else None
+            if not blob or "data" not in blob:
+                self._log("failed to get shared blob from RTDB:", blob_hash, _status(response))
+                continue
+            try:
+                blobs[blob_hash] = _decode_blob(blob["data"])
+            except Exception as e:
+                self._log("failed to decode shared blob:", blob_hash, type(e), e)
+
+        return blobs
+
+    def save(self, share_id, owner_id, manifest, blobs):
+        today = datetime.now().date().isoformat()
+
+        # content of the files is stored only once, blobs which are already stored just get the timestamp
+        stored_blobs = self._stored_blobs(blobs)
+        blob_updates = {blob_hash: {"data": _encode_blob(content)} for blob_hash, content in blobs.items()
+                        if blob_hash not in stored_blobs}
+
+        rtdb_client = RTDBClient.instance()
+        futures = [
+            rtdb_client.submit(rtdb_client.put, "user_metadata/" + share_id,
+                               {"created": today, "last_used": today, "owner_id": owner_id}),
+            rtdb_client.submit(rtdb_client.put, "user_workspaces/" + share_id, manifest)
+        ]
+        if blob_updates:
+            futures.append(rtdb_client.submit(rtdb_client.patch, "user_blobs", blob_updates))
+        if blobs:
+            futures.append(rtdb_client.submit(rtdb_client.patch, "user_blobs_last_used",
+                                              {blob_hash: today for blob_hash in blobs}))
+
+        success = True
+        for future in futures:
+            result = future.result()
+            if not _succeeded(result):
+                self._log("sharing workspace via RTDB failed:", _status(result))
+                success = False
+        return success
+
+    def touch(self, share_id, hashes):
+        today = datetime.now().date().isoformat()
+        rtdb_client = RTDBClient.instance()
+        if hashes:
+            rtdb_client.patch("user_blobs_last_used", {blob_hash: today for blob_hash in hashes})
+        response = rtdb_client.patch("user_metadata/" + share_id, {"last_used": today})
+        if _succeeded(response):
+            self._log("successfully updated last_used timestamp for share_id:", share_id)
+        else:
+            self._log("failed to update last_used timestamp for share_id:", share_id)
+
+    def expire(self, last_used):
+        # blobs shared by live shares get their timestamp updated together with the shares,
+        # timestamps of the blobs are kept aside, thus the query doesn't download their data
+        self._expire(last_used, "user_metadata", "last_used", ["user_workspaces", "user_metadata"])
+        self._expire(last_used, "user_blobs_last_used", "$value", ["user_blobs", "user_blobs_last_used"])
+
+    def _expire(self, last_used, index_path, order_by, delete_paths):
+        rtdb_client = RTDBClient.instance()
+        while True:
+            # needs ".indexOn" rule on the index_path, see README
+            response = rtdb_client.get(index_path, {"orderBy": json.dumps(order_by),
+                                                    "endAt": json.dumps(last_used),
+                                                    "limitToFirst": EXPIRY_BATCH})
+            if not _succeeded(response):
+                # without the index the RTDB rejects the query, nothing is deleted until the rule is added
+                Logger.warning("share_rtdb:", "failed to query old entries in:", index_path, _status(response))
                 return
 
-            today = datetime.now().date()
-            deletes = {
-                k: None for k, v in dates_json.items() if
-                (today - datetime.fromisoformat(v["last_used"]).date()).days > DAYS_LIMIT
-            }
-
-            result = requests.patch(FIREBASE_RTDB + "user_workspaces.json",
-                                    params={"auth": os.getenv('AUTH_TOKEN')},
-                                    json=deletes)
-            if result.status_code != HTTPStatus.OK:
-                self._log("failed to delete old workspaces")
-
-            result = requests.patch(FIREBASE_RTDB + "user_metadata.json",
-                                    params={"auth": os.getenv('AUTH_TOKEN')},
-                                    json=deletes)
-            if result.status_code != HTTPStatus.OK:
-                self._log("failed to delete old dates")
-
-    def _restore_json(self, shared_json):
-        try:
-            ws_json = shared_json["ws"]
-            if not self._workspace.load_json(ws_json):
-                return False
-            self._generator.set_state(shared_json["generator"])
-            self._python_runner.check = shared_json["python_runner"]
-            return True
-        except Exception as e:
-            self._log("failed to parse shared json:", type(e), e)
-        return False
-
-    def _update_last_used(self, share_id):
-        response = requests.patch(FIREBASE_RTDB + "user_metadata/" + share_id + ".json",
-                                  params={"auth": os.getenv('AUTH_TOKEN')},
-                                  json={"last_used": datetime.now().date().isoformat()})
-        if response.status_code == HTTPStatus.OK:
-            self._log(f"successfully updated last_used timestamp for share_id: {share_id}!")
-        else:
-            self._log(f"failed to update last_used timestamp for share_id: {share_id}!")
+            expired = response.json()
+            if not expired:
+                return
+
+            self._log("deleting old entries in:", index_path, len(expired))
+            deletes = {key: None for key in expired}
+            # the index is deleted last, thus failed deletes are retried in the next run
+            for delete_path in delete_paths:
+                if not _succeeded(rtdb_client.patch(delete_path, deletes)):
+                    Logger.warning("share_rtdb:", "failed to delete old entries in:", delete_path)
+                    return
+
+            if len(expired) < EXPIRY_BATCH:
+                return
+
+    def _stored_blobs(self, hashes):
+        # blobs could be stored by another server process or expired meanwhile, only the keys are downloaded
+        rtdb_client = RTDBClient.instance()
+        futures = {blob_hash: rtdb_client.submit(rtdb_client.get, "user_blobs/" + blob_hash, {"shallow": "true"})
+                   for blob_hash in hashes}
+
+        stored_blobs = set()
+        for blob_hash, future in futures.items():
+            response = future.result()
+            blob = response.json() if _succeeded(response) else None
+            if isinstance(blob, dict) and "data" in blob:
+                stored_blobs.add(blob_hash)
+        return stored_blobs
+
+    def _log(self, *args):
+        Logger.log("share_rtdb:", *args)
+
+def _encode_blob(content):
+    return base64.b64encode(zlib.compress(content.encode(), 9)).decode("ascii")
+
+def _decode_blob(data):
+    return zlib.decompress(base64.b64decode(data)).decode()
+
+def _succeeded(response):
+    return response is not None and response.status_code == HTTPStatus.OK
 
-    def _get_json(self):
-        return {
-            "ws": self._workspace.get_json(),
-            "generator": self._generator.get_state(),
-            "python_runner": self._python_runner.check
-        }
+def _status(response):
+    return response.status_code if response is not None else "no response"
 
-FIREBASE_RTDB="https://interactive-zserio-default-rtdb.europe-west1.firebasedatabase.app/"
-DAYS_LIMIT=365
+EXPIRY_BATCH=500
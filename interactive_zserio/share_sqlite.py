@@ -0,0 +1,140 @@
+import json
+import os
+import sqlite3
+import threading
+import zlib
+
+from contextlib import contextmanager
+from datetime import datetime
+
+from interactive_zserio.logger import Logger
+from interactive_zserio.share_storage import ShareStorage
+
+class ShareSQLite(ShareStorage):
+    def __init__(self, db_path):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # single connection per server process, other processes are synchronized by the database locks
+        self._connection = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT, isolation_level=None,
+                                           check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            # WAL allows readers from other processes to run concurrently with a writer
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            with self._transaction():
+                for statement in SCHEMA:
+                    self._connection.execute(statement)
+
+    def get_owner(self, share_id):
+        row = self._query_one("SELECT owner_id FROM shares WHERE share_id = ?", (share_id,))
+        return row[0] if row is not None else None
+
+    def load(self, share_id):
+        row = self._query_one("SELECT manifest FROM shares WHERE share_id = ?", (share_id,))
+        if row is None:
+            self._log("shared workspace does not exists:", share_id)
+            return None
+        return json.loads(row[0])
+
+    def load_blobs(self, hashes):
+        blobs = {}
+        hashes = list(hashes)
+        for i in range(0, len(hashes), QUERY_BATCH):
+            batch = hashes[i:i + QUERY_BATCH]
+            try:
+                with self._lock:
+                    rows = self._connection.execute(
+                            f"SELECT hash, data FROM blobs WHERE hash IN ({','.join('?' * len(batch))})",
+                            batch).fetchall()
+            except sqlite3.Error as e:
+                self._log("failed to load blobs:", type(e), e)
+                return blobs
+            for blob_hash, data in rows:
+                blobs[blob_hash] = zlib.decompress(data).decode()
+        return blobs
+
+    def save(self, share_id, owner_id, manifest, blobs):
+        today = datetime.now().date().isoformat()
+        try:
+            with self._lock, self._transaction():
+                known = set()
+                blob_hashes = list(blobs)
+                for i in range(0, len(blob_hashes), QUERY_BATCH):
+                    batch = blob_hashes[i:i + QUERY_BATCH]
+                    known.update(row[0] for row in self._connection.execute(
+                            f"SELECT hash FROM blobs WHERE hash IN ({','.join('?' * len(batch))})", batch))
+
+                # content of the files is stored only once, blobs which are already stored just get the timestamp
+                self._connection.executemany("UPDATE blobs SET last_used = ? WHERE hash = ?",
+                                             [(today, blob_hash) for blob_hash in known])
+                self._connection.executemany("INSERT INTO blobs (hash, data, last_used) VALUES (?, ?, ?)",
+                                             [(blob_hash, zlib.compress(content.encode(), 9), today)
+                                              for blob_hash, content in blobs.items() if blob_hash not in known])
+                self._connection.execute("INSERT OR REPLACE INTO shares (share_id, owner_id, created, last_used, "
+                                         "manifest) VALUES (?, ?, ?, ?, ?)",
+                                         (share_id, owner_id, today, today, json.dumps(manifest)))
+        except sqlite3.Error as e:
+            self._log("sharing workspace failed:", type(e), e)
+            return False
+        return True
+
+    def touch(self, share_id, hashes):
+        today = datetime.now().date().isoformat()
+        try:
+            with self._lock, self._transaction():
+                self._connection.execute("UPDATE shares SET last_used = ? WHERE share_id = ?", (today, share_id))
+                self._connection.executemany("UPDATE blobs SET last_used = ? WHERE hash = ?",
+                                             [(today, blob_hash) for blob_hash in hashes])
+        except sqlite3.Error as e:
+            self._log("failed to update last_used timestamp for share_id:", share_id, type(e), e)
+
+    def expire(self, last_used):
+        for table in ("shares", "blobs"):
+            while True:
+                # short transactions using the last_used index don't block other processes for long
+                try:
+                    with self._lock, self._transaction():
+                        deleted = self._connection.execute(
+                                f"DELETE FROM {table} WHERE rowid IN "
+                                f"(SELECT rowid FROM {table} WHERE last_used <= ? LIMIT ?)",
+                                (last_used, EXPIRY_BATCH)).rowcount
+                except sqlite3.Error as e:
+                    self._log("failed to delete old entries in:", table, type(e), e)
+                    break
+                if deleted:
+                    self._log("deleted old entries in:", table, deleted)
+                if deleted < EXPIRY_BATCH:
+                    break
+
+    def _query_one(self, query, params):
+        try:
+            with self._lock:
+                return self._connection.execute(query, params).fetchone()
+        except sqlite3.Error as e:
+            self._log("query failed:", type(e), e)
+            return None
+
+    @contextmanager
+    def _transaction(self):
+        # take the write lock immediately to avoid deadlocks of readers upgrading to writers
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+
+    def _log(self, *args):
+        Logger.log("share_sqlite:", *args)
+
+SCHEMA=[
+    "CREATE TABLE IF NOT EXISTS shares (share_id TEXT PRIMARY KEY, owner_id TEXT NOT NULL, "
+    "created TEXT NOT NULL, last_used TEXT NOT NULL, manifest TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS shares_last_used ON shares (last_used)",
+    "CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, data BLOB NOT NULL, last_used TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS blobs_last_used ON blobs (last_used)",
+]
+BUSY_TIMEOUT=10
+QUERY_BATCH=500
+EXPIRY_BATCH=500
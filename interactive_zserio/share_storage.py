@@ -0,0 +1,46 @@
+import os
+import tempfile
+import threading
+
+class ShareStorage:
+    @staticmethod
+    def instance():
+        global _share_storage
+        with _share_storage_lock:
+            if _share_storage is None:
+                if SHARE_STORAGE == "rtdb":
+                    from interactive_zserio.share_rtdb import ShareRTDB
+                    _share_storage = ShareRTDB()
+                elif SHARE_STORAGE == "sqlite":
+                    from interactive_zserio.share_sqlite import ShareSQLite
+                    _share_storage = ShareSQLite(SHARE_DB)
+                else:
+                    raise ValueError(f"unknown share storage: '{SHARE_STORAGE}'")
+            return _share_storage
+
+    def get_owner(self, share_id):
+        raise NotImplementedError()
+
+    def load(self, share_id):
+        # returns the shared json (manifest) or None when it doesn't exist or cannot be loaded
+        raise NotImplementedError()
+
+    def load_blobs(self, hashes):
+        # returns contents of the blobs which could be loaded
+        raise NotImplementedError()
+
+    def save(self, share_id, owner_id, manifest, blobs):
+        raise NotImplementedError()
+
+    def touch(self, share_id, hashes):
+        raise NotImplementedError()
+
+    def expire(self, last_used):
+        # deletes shares and blobs which haven't been used after the given date
+        raise NotImplementedError()
+
+SHARE_STORAGE=os.getenv("INTERACTIVE_ZSERIO_SHARE_STORAGE", "rtdb")
+SHARE_DB=os.getenv("INTERACTIVE_ZSERIO_SHARE_DB", os.path.join(tempfile.gettempdir(), "interactive_zserio_shares.db"))
+
+_share_storage = None
+_share_storage_lock = threading.Lock()
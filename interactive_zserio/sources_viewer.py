@@ -1,19 +1,20 @@
 import os
 import streamlit as st
 
-from glob import glob
-
-from interactive_zserio.widget import Widget
+from interactive_zserio.widget import Widget, timed
 
 class SourcesViewer(Widget):
     def __init__(self, gen_dir):
         super().__init__("sources_viewer")
         self._gen_dir = gen_dir
         self._generators = None
+        self._digests = {}
 
-    def set_generators(self, generators):
+    def set_generators(self, generators, digests=None):
         self._generators = generators
+        self._digests = digests if digests is not None else {}
 
+    @timed
     def render(self):
         checked_generators = [generator for generator in self._generators if self._generators[generator]]
         self._log("render", checked_generators)
@@ -25,15 +26,83 @@ class SourcesViewer(Widget):
 
     def _display_sources(self, generator):
         st.caption(generator)
-        generated_sources = glob(self._gen_dir + "/" + generator + "/**", recursive=True)
-        for source in generated_sources:
-            if os.path.isfile(source):
-                with open(source, "r") as source_file:
-                    with st.expander(os.path.relpath(source, self._gen_dir)):
-                        st.code(source_file.read(), self._map_highlighting(generator))
+        generated_sources = self._get_index(generator)
+
+        name_filter = ""
+        if len(generated_sources) > FILTER_THRESHOLD:
+            name_filter = st.text_input("Filter", key=self._key(generator + "_filter"),
+                                        placeholder="Type to filter generated files",
+                                        label_visibility="collapsed")
+        if name_filter:
+            generated_sources = [source for source in generated_sources if name_filter.lower() in source.lower()]
+
+        # contents are read only for the opened file, collapsed sources don't cost anything
+        options = [None] + generated_sources
+        if (self._key(generator + "_source") in st.session_state and
+                st.session_state[self._key(generator + "_source")] not in options):
+            del st.session_state[self._key(generator + "_source")]
+        source = st.selectbox(f"{generator} sources", options, key=self._key(generator + "_source"),
+                              format_func=lambda x: (f"Choose from {len(generated_sources)} files..."
+                                                     if x is None else x),
+                              label_visibility="collapsed")
+        if source is not None:
+            self._display_source(generator, source)
+
+    def _display_source(self, generator, source):
+        source_path = os.path.join(self._gen_dir, source)
+        page_offsets = self._get_page_offsets(generator, source)
+
+        page = 0
+        if len(page_offsets) > 2:
+            page = st.number_input(f"Page (of {len(page_offsets) - 1})", min_value=1,
+                                   max_value=len(page_offsets) - 1,
+                                   key=self._key(generator + "_page_" + source)) - 1
+
+        with open(source_path, "rb") as source_file:
+            source_file.seek(page_offsets[page])
+            content = source_file.read(page_offsets[page + 1] - page_offsets[page])
+        st.code(content.decode("utf-8", errors="replace"), self._map_highlighting(generator))
+
+    def _get_index(self, generator):
+        # generated sources don't change until the next generation, thus they are listed only once
+        cache = self._get_cache(generator)
+        if cache["index"] is None:
+            generator_dir = os.path.join(self._gen_dir, generator)
+            index = []
+            for root, _, files in os.walk(generator_dir):
+                for name in files:
+                    index.append(os.path.relpath(os.path.join(root, name), self._gen_dir))
+            index.sort()
+            cache["index"] = index
+        return cache["index"]
+
+    def _get_page_offsets(self, generator, source):
+        pages = self._get_cache(generator)["pages"]
+        if source not in pages:
+            with open(os.path.join(self._gen_dir, source), "rb") as source_file:
+                content = source_file.read()
+            # split large files into pages of whole lines
+            page_offsets = [0]
+            while len(content) - page_offsets[-1] > PAGE_SIZE:
+                end = content.rfind(b"\n", page_offsets[-1], page_offsets[-1] + PAGE_SIZE)
+                page_offsets.append(end + 1 if end > page_offsets[-1] else page_offsets[-1] + PAGE_SIZE)
+            page_offsets.append(len(content))
+            pages[source] = page_offsets
+        return pages[source]
+
+    def _get_cache(self, generator):
+        digest = self._digests.get(generator)
+        if self._key("cache") not in st.session_state:
+            st.session_state[self._key("cache")] = {}
+        caches = st.session_state[self._key("cache")]
+        if digest is None or generator not in caches or caches[generator][0] != digest:
+            caches[generator] = (digest, {"index": None, "pages": {}})
+        return caches[generator][1]
 
     def _map_highlighting(self, generator):
         if generator == "doc":
             return "html"
         return generator
 
+FILTER_THRESHOLD=10
+PAGE_SIZE=64 * 1024
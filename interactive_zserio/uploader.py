@@ -1,19 +1,23 @@
 import os
 import shutil
 import streamlit as st
+import zlib
 
-from zipfile import ZipFile
+from zipfile import ZipFile, BadZipFile
 
-from interactive_zserio.widget import Widget
+from interactive_zserio.widget import Widget, timed
+from interactive_zserio.file_index import FileIndex
+from interactive_zserio.zip_extractor import ZipExtractor, ZipLimitError, MAX_FILE_SIZE
 
 class Uploader(Widget):
-    def __init__(self, tmp_dir, ws_dir, zs_dir):
+    def __init__(self, tmp_dir, workspace, reset_callback=None):
         super().__init__("uploader")
         self._tmp_dir = tmp_dir
-        self._ws_dir = ws_dir
-        self._ws_name = os.path.relpath(ws_dir, tmp_dir)
-        self._zs_dir = zs_dir
+        self._workspace = workspace
+        self._ws_name = os.path.relpath(workspace.ws_dir, tmp_dir)
+        self._reset_callback = reset_callback
 
+    @timed
     def render(self):
         self._log("render")
         upload_help = "Upload either a simple schema file *.zs, or complex schema as a *.zip or even "
@@ -23,26 +27,76 @@ class Uploader(Widget):
         if not uploaded_schema:
             st.stop()
 
+    @staticmethod
+    def save(uploaded_file, path):
+        # streams the uploaded file to the disk by chunks
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        uploaded_file.seek(0)
+        with open(path, "wb") as f:
+            for chunk in _read_chunks(uploaded_file):
+                f.write(chunk)
+
     def _on_change(self):
-        shutil.rmtree(self._zs_dir)
-        os.makedirs(self._zs_dir)
+        shutil.rmtree(self._workspace.zs_dir)
+        os.makedirs(self._workspace.zs_dir)
         uploaded_schema = st.session_state[self._key("uploaded_schema")]
         if uploaded_schema:
-            self._process_uploaded_file(uploaded_schema)
+            try:
+                self._process_uploaded_file(uploaded_schema)
+            except (ZipLimitError, BadZipFile, zlib.error) as e:
+                self._log("rejecting uploaded file:", uploaded_schema.name, e)
+                # don't leave partially extracted archive
+                self._reset_workspace()
+                st.error(f"Uploaded file rejected: {e}")
+        FileIndex.invalidate(self._workspace.ws_dir)
 
     def _process_uploaded_file(self, uploaded_file):
+        zs_folder = os.path.relpath(self._workspace.zs_dir, self._workspace.ws_dir)
         if uploaded_file.name.endswith(".zs"):
             self._log("processing *.zs file:", uploaded_file.name)
-            with open(os.path.join(self._zs_dir, uploaded_file.name), "wb") as zs_file:
-                zs_file.write(uploaded_file.read())
+            if uploaded_file.size > MAX_FILE_SIZE:
+                raise ZipLimitError(f"File '{uploaded_file.name}' is too large")
+            self._workspace.restore([(os.path.join(zs_folder, uploaded_file.name), _read_chunks(uploaded_file))])
         elif uploaded_file.name.endswith(".zip"):
             with ZipFile(uploaded_file, "r") as zip_file:
-                if all(name.startswith(self._ws_name) for name in zip_file.namelist()):
+                extractor = ZipExtractor(zip_file)
+                names = [info.filename for info in zip_file.infolist() if not info.is_dir()]
+                if all(name.startswith(self._ws_name + "/") for name in names):
                     self._log("processing *.zip workspace file:", uploaded_file.name)
-                    shutil.rmtree(self._ws_dir)
-                    zip_file.extractall(self._tmp_dir)
+                    # only sources are restored, generated files would be regenerated anyway
+                    sources = [os.path.join(self._ws_name, os.path.relpath(folder, self._workspace.ws_dir), "")
+                               for folder in (self._workspace.zs_dir, self._workspace.src_dir)]
+                    members = extractor.select(lambda name: any(name.startswith(source) for source in sources))
+                    self._reset_workspace()
+                    self._workspace.restore(extractor.extract(members,
+                                                              lambda name: os.path.relpath(name, self._ws_name),
+                                                              self._get_progress(members)))
                 else:
                     self._log("processing *.zip schema file:", uploaded_file.name)
-                    zip_file.extractall(self._zs_dir)
+                    members = extractor.select(lambda name: name.endswith(".zs"))
+                    self._workspace.restore(extractor.extract(members, lambda name: os.path.join(zs_folder, name),
+                                                              self._get_progress(members)))
         else:
             st.error("Unsupported uploaded file type")
+
+    def _reset_workspace(self):
+        self._workspace.reset()
+        if self._reset_callback:
+            # generated files are gone, e.g. the generator must not consider them up to date
+            self._reset_callback()
+
+    def _get_progress(self, members):
+        if sum(info.file_size for info in members) < PROGRESS_THRESHOLD:
+            return None
+        progress_bar = st.progress(0.0, "Extracting...")
+        return lambda extracted, total: progress_bar.progress(min(extracted / total, 1.0), "Extracting...")
+
+def _read_chunks(file):
+    while True:
+        chunk = file.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+CHUNK_SIZE=64 * 1024
+PROGRESS_THRESHOLD=4 * 1024 * 1024
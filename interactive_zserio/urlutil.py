@@ -8,13 +8,17 @@ class URLUtil(Widget):
         super().__init__("URLUtil")
 
     def get_current_url(self):
-        headers = _get_websocket_headers()
-        return headers["Host"]
+        try:
+            headers = _get_websocket_headers()
+        except RuntimeError:
+            # there are no headers when the app is not served by a browser, e.g. in AppTest
+            headers = None
+        return headers["Host"] if headers is not None else ""
 
     def get_url_params(self):
         params = st.experimental_get_query_params()
         return params
 
     def set_url_params(self, params):
-        self._log(f"setting url params: {params}")
+        self._log("setting url params:", params)
         st.experimental_set_query_params(**params)
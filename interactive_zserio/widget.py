@@ -1,4 +1,11 @@
+import functools
+import time
+import streamlit as st
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
 from interactive_zserio.logger import Logger
+from interactive_zserio.metrics import Metrics
 
 class Widget:
     def __init__(self, name):
@@ -12,4 +19,36 @@ class Widget:
         return self._name + "_" + key
 
     def _log(self, *args):
-        Logger.log(self.name + ":", *args)
+        Logger.debug(self.name + ":", *args)
+
+    def _span(self, name):
+        return Metrics.instance().span(self.name + "." + name, self._session_id)
+
+    @property
+    def _session_id(self):
+        ctx = get_script_run_ctx()
+        return ctx.session_id if ctx is not None else None
+
+    def _wait_for(self, jobs):
+        status = st.empty()
+        while not all(job.done() for job in jobs):
+            positions = [position for position in (job.position for job in jobs) if position is not None]
+            if positions:
+                status.info(f"Queued (position {min(positions)})")
+            else:
+                status.empty()
+            time.sleep(JOB_POLL_INTERVAL)
+        status.empty()
+
+def timed(func):
+    # measures the method in the metrics, e.g. "generator.render"
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self._span(func.__name__.lstrip("_")):
+            return func(self, *args, **kwargs)
+    return wrapper
+
+JOB_POLL_INTERVAL=0.05
+
+# st.fragment is available as st.experimental_fragment in older streamlit versions
+fragment = st.fragment if hasattr(st, "fragment") else st.experimental_fragment
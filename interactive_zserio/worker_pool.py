@@ -0,0 +1,145 @@
+import json
+import os
+import queue
+import select
+import subprocess
+import sys
+import threading
+
+from interactive_zserio.logger import Logger
+
+class WorkerError(Exception):
+    pass
+
+class WorkerTimeout(WorkerError):
+    pass
+
+class Worker:
+    def __init__(self, module, *, env=None, start_timeout=60):
+        self._process = subprocess.Popen([sys.executable, "-m", module],
+                                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env, text=True)
+        try:
+            self._receive(start_timeout)
+        except WorkerError:
+            self.close()
+            raise
+
+    def request(self, message, timeout):
+        try:
+            self._process.stdin.write(json.dumps(message) + "\n")
+            self._process.stdin.flush()
+        except OSError as e:
+            raise WorkerError(f"failed to send job: {e}") from e
+
+        return self._receive(timeout)
+
+    def close(self):
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.wait()
+
+    def _receive(self, timeout):
+        readable, _, _ = select.select([self._process.stdout], [], [], timeout)
+        if not readable:
+            raise WorkerTimeout(f"no response within {timeout}s")
+        line = self._process.stdout.readline()
+        if not line:
+            raise WorkerError("worker closed the channel")
+        try:
+            response = json.loads(line)
+        except ValueError as e:
+            raise WorkerError(f"invalid response: {e}") from e
+        if "error" in response:
+            raise WorkerError(response["error"])
+        return response
+
+class WorkerPool:
+    def __init__(self, name, size, worker_factory):
+        self._name = name
+        self._worker_factory = worker_factory
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._live = 0
+        self._disabled = size <= 0
+
+        for _ in range(size):
+            self._spawn()
+
+    def _acquire(self, timeout):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._disabled or self._live == 0:
+                # no warm worker is available yet, don't wait for the start-up
+                return None
+
+        # all warm workers are busy, but waiting for them is still much faster than a cold start
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _release(self, worker):
+        self._idle.put(worker)
+
+    def _discard(self, worker, error):
+        Logger.warning(self._name + ":", "worker failed, replacing it:", error)
+        worker.close()
+        with self._lock:
+            self._live -= 1
+        self._spawn()
+
+    def _spawn(self):
+        if self._disabled:
+            return
+        threading.Thread(target=self._start_worker, daemon=True).start()
+
+    def _start_worker(self, attempt=0):
+        try:
+            worker = self._worker_factory()
+        except (WorkerError, OSError) as e:
+            # cold runs are used until a retry succeeds
+            delay = min(START_RETRY_DELAY * 2 ** attempt, START_RETRY_MAX_DELAY)
+            Logger.warning(self._name + ":", f"failed to start worker, retrying in {delay}s:", e)
+            retry = threading.Timer(delay, self._start_worker, (attempt + 1,))
+            retry.daemon = True
+            retry.start()
+            return
+
+        with self._lock:
+            self._live += 1
+        self._idle.put(worker)
+        Logger.info(self._name + ":", "warm worker ready")
+
+def _send(channel, message):
+    channel.write(json.dumps(message) + "\n")
+    channel.flush()
+
+def serve(start):
+    # keep the original stdout as a private channel, anything else printed to stdout goes to stderr
+    channel = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    try:
+        try:
+            handle = start(channel)
+        except Exception as e:
+            _send(channel, {"error": f"{type(e).__name__}: {e}"})
+            return
+
+        _send(channel, {"ready": True})
+        for line in sys.stdin:
+            try:
+                response = handle(json.loads(line))
+            except Exception as e:
+                response = {"error": f"{type(e).__name__}: {e}"}
+            _send(channel, response)
+    except OSError:
+        pass # the server process has gone away, e.g. it has given up waiting for the start
+
+START_RETRY_DELAY=5
+START_RETRY_MAX_DELAY=600
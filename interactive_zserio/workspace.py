@@ -1,7 +1,9 @@
+import hashlib
 import os
 import shutil
 
 from interactive_zserio.widget import Widget
+from interactive_zserio.file_index import FileIndex
 
 class Workspace(Widget):
     def __init__(self, ws_dir):
@@ -36,25 +38,42 @@ class Workspace(Widget):
 
     def clear(self):
         shutil.rmtree(self._ws_dir, ignore_errors=True)
+        FileIndex.invalidate(self._ws_dir)
 
     def reset(self):
         self.clear()
         self.create()
 
+    def snapshot(self):
+        # sources only, generated files can be always regenerated
+        return WorkspaceSnapshot(self._ws_dir, [os.path.relpath(self._zs_dir, self._ws_dir),
+                                                os.path.relpath(self._src_dir, self._ws_dir)])
+
+    def restore(self, files):
+        # files are pairs of a path relative to the workspace and an iterable of content chunks
+        count = 0
+        try:
+            for path, chunks in files:
+                full_path = os.path.join(self._ws_dir, _check_path(path))
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                with open(full_path, "wb") as f:
+                    for chunk in chunks:
+                        f.write(chunk)
+                count += 1
+        finally:
+            FileIndex.invalidate(self._ws_dir)
+        return count
+
     def load_json(self, json):
         self._log("loading json")
 
+        files = [(os.path.join(self._zs_dir, src["name"]), src["content"]) for src in json["zs"]]
+        if "src" in json and "python" in json["src"]:
+            files += [(os.path.join(self._src_dir, "python", src["name"]), src["content"])
+                      for src in json["src"]["python"]]
+
         try:
-            for src in json["zs"]:
-                with open(os.path.join(self._zs_dir, src["name"]), "w") as f:
-                    f.write(src["content"])
-
-            if "src" in json and "python" in json["src"]:
-                python_dir = os.path.join(self._src_dir, "python")
-                os.makedirs(python_dir, exist_ok=True)
-                for src in json["src"]["python"]:
-                    with open(os.path.join(python_dir, src["name"]), "w") as f:
-                        f.write(src["content"])
+            self.restore((os.path.relpath(path, self._ws_dir), [content.encode()]) for path, content in files)
         except Exception as e:
             self._log("loading json failed:", type(e), e)
             return False
@@ -69,17 +88,75 @@ class Workspace(Widget):
     def get_json(self):
         ws_json = {"zs": [], "src": {}}
 
-        for root, _, files in os.walk(self._zs_dir):
-            for name in files:
-                with open(os.path.join(root, name)) as f:
-                    ws_json["zs"].append({"name": name, "content": f.read()})
-
-        python_dir = os.path.join(self._src_dir, "python")
-        if os.path.exists(python_dir):
+        snapshot = self.snapshot()
+        zs_folder = os.path.relpath(self._zs_dir, self._ws_dir)
+        python_folder = os.path.relpath(os.path.join(self._src_dir, "python"), self._ws_dir)
+        if os.path.exists(os.path.join(self._ws_dir, python_folder)):
             ws_json["src"]["python"] = []
-            for root, _, files in os.walk(python_dir):
-                for name in files:
-                    with open(os.path.join(root, name)) as f:
-                        ws_json["src"]["python"].append({"name": name, "content": f.read()})
+
+        for path in snapshot.files:
+            if _is_within(path, zs_folder):
+                ws_json["zs"].append({"name": os.path.relpath(path, zs_folder), "content": snapshot.read(path)})
+            elif _is_within(path, python_folder):
+                ws_json["src"]["python"].append({"name": os.path.relpath(path, python_folder),
+                                                 "content": snapshot.read(path)})
 
         return ws_json
+
+class WorkspaceSnapshot:
+    def __init__(self, root, folders, exclude_extensions=None):
+        self._root = root
+        exclude_extensions = exclude_extensions if exclude_extensions is not None else []
+
+        # only metadata are collected up front, contents are read on demand
+        self._files = {}
+        for folder in folders:
+            for dir_path, _, files in os.walk(os.path.join(root, folder)):
+                for name in files:
+                    if any(name.endswith("." + ext) for ext in exclude_extensions):
+                        continue
+                    full_path = os.path.join(dir_path, name)
+                    stat = os.stat(full_path)
+                    self._files[os.path.relpath(full_path, root)] = (stat.st_size, stat.st_mtime_ns)
+        self._files = dict(sorted(self._files.items()))
+
+    @property
+    def files(self):
+        return list(self._files)
+
+    @property
+    def count(self):
+        return len(self._files)
+
+    @property
+    def size(self):
+        return sum(size for size, _ in self._files.values())
+
+    @property
+    def fingerprint(self):
+        fingerprint = hashlib.sha256()
+        for path, (size, mtime) in self._files.items():
+            fingerprint.update(f"{path}\0{size}\0{mtime}\0".encode())
+        return fingerprint.hexdigest()
+
+    def read_chunks(self, path):
+        with open(os.path.join(self._root, path), "rb") as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+    def read(self, path):
+        return b"".join(self.read_chunks(path)).decode()
+
+def _check_path(path):
+    normalized = os.path.normpath(path)
+    if os.path.isabs(normalized) or normalized == ".." or normalized.startswith(".." + os.sep):
+        raise ValueError(f"path outside of the workspace: '{path}'")
+    return normalized
+
+def _is_within(path, folder):
+    return path.startswith(folder + os.sep)
+
+CHUNK_SIZE=64 * 1024
@@ -0,0 +1,82 @@
+import os
+
+class ZipLimitError(Exception):
+    pass
+
+class ZipExtractor:
+    def __init__(self, zip_file, *, max_size=None, max_files=None, max_file_size=None, max_ratio=None):
+        self._zip_file = zip_file
+        self._max_size = max_size if max_size is not None else MAX_SIZE
+        self._max_files = max_files if max_files is not None else MAX_FILES
+        self._max_file_size = max_file_size if max_file_size is not None else MAX_FILE_SIZE
+        self._max_ratio = max_ratio if max_ratio is not None else MAX_RATIO
+        self._total_size = 0
+        self._extracted = 0
+
+    def select(self, accept):
+        # checks the declared sizes up front, the real sizes are checked during the extraction
+        members = []
+        total_size = 0
+        for info in self._zip_file.infolist():
+            if info.is_dir():
+                continue
+            _check_name(info.filename)
+            if not accept(info.filename):
+                continue
+
+            members.append(info)
+            if len(members) > self._max_files:
+                raise ZipLimitError(f"Too many files, at most {self._max_files} files are allowed")
+            self._check_file_size(info.filename, info.file_size)
+            if info.file_size > RATIO_MIN_SIZE and info.file_size > info.compress_size * self._max_ratio:
+                raise ZipLimitError(f"Suspicious compression ratio of '{info.filename}'")
+            total_size += info.file_size
+            if total_size > self._max_size:
+                raise ZipLimitError(f"Archive is too large, at most {_format_size(self._max_size)} is allowed")
+
+        return members
+
+    def extract(self, members, rename, progress=None):
+        # generates pairs of a path and content chunks suitable for Workspace.restore
+        self._total_size = sum(info.file_size for info in members)
+        self._extracted = 0
+        for info in members:
+            yield rename(info.filename), self._read_member(info, progress)
+
+    def _read_member(self, info, progress):
+        size = 0
+        with self._zip_file.open(info) as member:
+            while True:
+                chunk = member.read(CHUNK_SIZE)
+                if not chunk:
+                    return
+                # declared sizes cannot be trusted
+                size += len(chunk)
+                self._extracted += len(chunk)
+                if size > info.file_size:
+                    raise ZipLimitError(f"File '{info.filename}' is larger than declared")
+                self._check_file_size(info.filename, size)
+                if progress is not None:
+                    progress(self._extracted, self._total_size)
+                yield chunk
+
+    def _check_file_size(self, name, size):
+        if size > self._max_file_size:
+            raise ZipLimitError(f"File '{name}' is too large, at most {_format_size(self._max_file_size)} "
+                                "is allowed")
+
+def _check_name(name):
+    normalized = os.path.normpath(name)
+    if (os.path.isabs(name) or "\\" in name or normalized == ".." or
+            normalized.startswith(".." + os.sep)):
+        raise ZipLimitError(f"Invalid path '{name}' in the archive")
+
+def _format_size(size):
+    return f"{size / 1024 / 1024:.0f} MiB"
+
+MAX_SIZE=int(os.getenv("INTERACTIVE_ZSERIO_UPLOAD_MAX_SIZE_MB", "64")) * 1024 * 1024
+MAX_FILES=int(os.getenv("INTERACTIVE_ZSERIO_UPLOAD_MAX_FILES", "5000"))
+MAX_FILE_SIZE=int(os.getenv("INTERACTIVE_ZSERIO_UPLOAD_MAX_FILE_SIZE_MB", "8")) * 1024 * 1024
+MAX_RATIO=int(os.getenv("INTERACTIVE_ZSERIO_UPLOAD_MAX_RATIO", "100"))
+RATIO_MIN_SIZE=1024 * 1024
+CHUNK_SIZE=64 * 1024
@@ -0,0 +1,233 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from importlib.metadata import version
+
+from rtdb_stand_in import RTDBStandIn
+
+rtdb = RTDBStandIn().start()
+os.environ["INTERACTIVE_ZSERIO_RTDB_URL"] = rtdb.url
+os.environ["INTERACTIVE_ZSERIO_SHARE_STORAGE"] = "rtdb"
+# real compilations, not the entries left in the shared compile cache by previous benchmarks or by the app
+cache_dir = tempfile.TemporaryDirectory(prefix="interactive_zserio_benchmark_cache_")
+os.environ["INTERACTIVE_ZSERIO_CACHE_DIR"] = cache_dir.name
+
+from streamlit.testing.v1 import AppTest
+
+from interactive_zserio import editor
+from interactive_zserio.metrics import Metrics
+
+def make_share(size, run):
+    # the main schema imports size - 1 packages, the run number makes the schema unique to bypass the caches
+    items = [f"Item{i}" for i in range(size - 1)]
+    main = f"package bench;\n\n// run {run}\n\n"
+    main += "".join(f"import bench.types_{i}.*;\n" for i in range(size - 1))
+    main += "\nstruct Data\n{\n    uint32 id;\n    string text;\n"
+    main += "".join(f"    {item} item{i};\n" for i, item in enumerate(items))
+    main += "};\n"
+
+    zs = [{"name": "bench.zs", "content": main}]
+    for i, item in enumerate(items):
+        zs.append({"name": f"bench/types_{i}.zs",
+                   "content": f"package bench.types_{i};\n\nstruct {item}\n{{\n    uint32 id;\n    string name;\n}};\n"})
+
+    return {
+        "ws": {"zs": zs, "src": {"python": [{"name": "bench.py", "content": PYTHON_CODE.format(size - 1)}]}},
+        "generator": {"generators": {"cpp": False, "doc": False, "java": False, "python": True, "xml": False},
+                      "extra_args": ""},
+        "python_runner": True
+    }
+
+class EditorInput:
+    # AppTest can't type into the ace component, thus the edits are returned in place of its content
+    def __init__(self):
+        self._edits = {}
+
+    def edit(self, key, content):
+        self._edits[key] = content
+
+    def __call__(self, content, key, **kwargs):
+        return self._edits.pop(key, content)
+
+editor_input = EditorInput()
+editor.st_ace = editor_input
+
+class Stages:
+    def __init__(self):
+        self.results = {}
+
+    def run(self, stage, app_test, action=None):
+        before = Metrics.instance().snapshot()
+        start = time.perf_counter()
+        if action is not None:
+            action(app_test)
+        app_test.run(timeout=TIMEOUT)
+        wall = time.perf_counter() - start
+        if app_test.exception:
+            raise RuntimeError(f"stage '{stage}' failed: {app_test.exception[0].message}")
+
+        result = self.results.setdefault(stage, {"reruns": [], "spans": {}})
+        result["reruns"].append(wall)
+        for name, histogram in Metrics.instance().snapshot().items():
+            spent = histogram["total"] - before.get(name, {}).get("total", 0.0)
+            if spent > 0:
+                result["spans"][name] = result["spans"].get(name, 0.0) + spent
+
+def run_stages(size, run):
+    share_id = f"bench_{size}_{run}"
+    rtdb.data.setdefault("user_workspaces", {})[share_id] = make_share(size, run)
+
+    stages = Stages()
+    app_test = AppTest.from_file("interactive_zserio.py")
+    app_test.query_params["share_id"] = share_id
+    stages.run("first_load", app_test)
+    assert app_test.session_state["schema_file_manager_selected_file"] == "bench.zs"
+
+    stages.run("rerun", app_test)
+
+    workspace_dir = os.path.join(app_test.session_state["main_view_temp_dir"].name, "workspace")
+    with open(os.path.join(workspace_dir, "zs", "bench.zs")) as schema:
+        content = schema.read()
+    stages.run("edit", app_test, lambda _: editor_input.edit("schema_editor_contentbench.zs",
+                                                            content + "\nstruct Edited\n{\n    uint32 id;\n};\n"))
+    assert os.path.exists(os.path.join(workspace_dir, "gen", "python", "bench", "edited.py"))
+
+    stages.run("toggle_generators", app_test, lambda app_test: app_test.checkbox(key="generator_cpp_gen").check())
+    stages.run("toggle_generators", app_test, lambda app_test: app_test.checkbox(key="generator_cpp_gen").uncheck())
+
+    stages.run("python", app_test, lambda app_test: app_test.button(key="python_runner_run_again").click())
+    assert "True" in app_test.text[-1].value
+
+    stages.run("download", app_test, lambda app_test: app_test.button(key="workspace_downloader_prepare").click())
+
+    stages.run("share", app_test, lambda app_test: share_button(app_test).click())
+    assert app_test.session_state["main_view_share_id"] in rtdb.data["user_metadata"]
+
+    return stages.results
+
+def share_button(app_test):
+    return next(button for button in app_test.button if button.label == "Save & Share Workspace")
+
+def benchmark(sizes, repeat):
+    results = {}
+    for size in sizes:
+        # the compiler JVMs need to warm up (JIT) for each workspace size, otherwise the first run is an outlier
+        run_stages(size, "warmup")
+        runs = [run_stages(size, run) for run in range(repeat)]
+        results[str(size)] = {}
+        for stage in runs[0]:
+            walls = [sum(stage_runs[stage]["reruns"]) for stage_runs in runs]
+            spans = {name: statistics.median(stage_runs[stage]["spans"].get(name, 0.0) for stage_runs in runs)
+                     for name in sorted(set(name for stage_runs in runs for name in stage_runs[stage]["spans"]))}
+            results[str(size)][stage] = {
+                "wall": statistics.median(walls),
+                "min": min(walls),
+                "max": max(walls),
+                "reruns": [statistics.median(walls) for walls in zip(*(stage_runs[stage]["reruns"]
+                                                                      for stage_runs in runs))],
+                "spans": spans
+            }
+            print(f"{size:>5} files  {stage:<18} {results[str(size)][stage]['wall']:8.3f}s", file=sys.stderr)
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "zserio": version("zserio"),
+            "streamlit": version("streamlit")
+        },
+        "repeat": repeat,
+        "results": results
+    }
+
+def find_regressions(current, baseline, tolerance, relative):
+    regressions = []
+    for size, stages in current["results"].items():
+        base_stages = baseline["results"].get(size, {})
+        common = [stage for stage in stages if stage in base_stages]
+        if not common:
+            continue
+        # relative comparison scales the baseline to the speed of the current machine, thus only the stages
+        # which take a larger share of the total time than in the baseline are reported
+        scale = 1.0
+        if relative:
+            scale = (sum(stages[stage]["wall"] for stage in common) /
+                     sum(base_stages[stage]["wall"] for stage in common))
+        for stage in common:
+            wall = stages[stage]["wall"]
+            expected = base_stages[stage]["wall"] * scale
+            if wall > expected * (1 + tolerance) and wall - expected > MIN_REGRESSION:
+                regressions.append({"size": int(size), "stage": stage, "baseline": base_stages[stage]["wall"],
+                                    "expected": expected, "current": wall, "ratio": wall / expected})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the interactive zserio app driven by AppTest.")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in SIZES),
+                        help="comma separated numbers of .zs files in the benchmarked workspaces")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="number of runs per size, median is reported")
+    parser.add_argument("--output", help="file to write the results to, stdout by default")
+    parser.add_argument("--baseline", default=BASELINE, help="results to check for regressions")
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="relative slowdown against the baseline reported as a regression")
+    parser.add_argument("--relative", action="store_true",
+                        help="compare shares of the stages in the total time per size instead of absolute times, "
+                             "for baselines measured on a different machine")
+    args = parser.parse_args()
+
+    if not args.update_baseline and not os.path.exists(args.baseline):
+        parser.error(f"baseline '{args.baseline}' doesn't exist, create it by --update-baseline")
+
+    results = benchmark([int(size) for size in args.sizes.split(",")], args.repeat)
+
+    regressions = []
+    if not args.update_baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = find_regressions(results, json.load(baseline_file), args.tolerance, args.relative)
+        results["regressions"] = regressions
+        for regression in regressions:
+            print(f"REGRESSION {regression['size']:>5} files  {regression['stage']:<18} "
+                  f"{regression['expected']:.3f}s -> {regression['current']:.3f}s", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+    if args.update_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            baseline_file.write(output + "\n")
+
+    rtdb.stop()
+    return 1 if regressions else 0
+
+PYTHON_CODE="""import importlib
+import zserio
+import bench.api as bench
+
+items = [getattr(importlib.import_module(f"bench.types_{{i}}.api"), f"Item{{i}}")(i, "item") for i in range({0})]
+data = bench.Data(1, "bench", *items)
+writer = zserio.BitStreamWriter()
+data.write(writer)
+read_data = bench.Data.from_reader(zserio.BitStreamReader(writer.byte_array, writer.bitposition))
+print(writer.bitposition, read_data == data)
+"""
+SIZES=[1, 10, 100, 500]
+REPEAT=3
+TIMEOUT=600
+BASELINE="benchmark_baseline.json"
+TOLERANCE=0.25
+# absolute slowdown in seconds below which differences are considered noise
+MIN_REGRESSION=0.05
+
+if __name__ == "__main__":
+    sys.exit(main())
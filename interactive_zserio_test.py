@@ -1,6 +1,57 @@
+import os
+
+from rtdb_stand_in import RTDBStandIn
+
+# the share widget queries the share storage already on start, the production database must not be touched
+rtdb = RTDBStandIn().start()
+os.environ["INTERACTIVE_ZSERIO_RTDB_URL"] = rtdb.url
+
 from streamlit.testing.v1 import AppTest
 
+from interactive_zserio import editor
+from interactive_zserio.session_registry import SessionRegistry
+
+# AppTest can't type into the ace component, thus the edits are returned in place of its content
+edits = {}
+editor.st_ace = lambda content, key, **kwargs: edits.pop(key, content)
+
 app_test = AppTest.from_file("interactive_zserio.py")
 app_test.run(timeout=30)
 
 assert not app_test.exception
+
+# without compilation, the edited schema is written at most once per interval or when it's downloaded
+for generator in ("cpp", "doc", "java", "python", "xml"):
+    if app_test.checkbox(key=f"generator_{generator}_gen").value:
+        app_test.checkbox(key=f"generator_{generator}_gen").uncheck().run(timeout=30)
+schema_file = app_test.session_state["schema_file_manager_selected_file"]
+schema_path = os.path.join(app_test.session_state["main_view_temp_dir"].name, "workspace", "zs", schema_file)
+with open(schema_path) as f:
+    content = f.read()
+
+def edit(comment):
+    edits["schema_editor_content" + schema_file] = content + comment
+    app_test.run(timeout=30)
+    assert not app_test.exception
+    with open(schema_path) as f:
+        return f.read()
+
+assert edit("\n// first\n").endswith("// first\n")
+assert edit("\n// second\n").endswith("// first\n")
+app_test.button(key="workspace_downloader_prepare").click().run(timeout=30)
+with open(schema_path) as f:
+    assert f.read().endswith("// second\n")
+
+# edits which are not written yet survive the eviction of the idle workspace, as well as the widget states
+assert edit("\n// third\n").endswith("// second\n")
+session_registry = SessionRegistry.instance()
+for session in list(session_registry._sessions.values()):
+    assert session_registry._evict(session, 0, "test")
+assert not os.path.exists(schema_path)
+app_test.run(timeout=30)
+assert not app_test.exception
+with open(schema_path) as f:
+    assert f.read().endswith("// third\n")
+assert not app_test.checkbox(key="generator_python_gen").value
+
+rtdb.stop()
@@ -0,0 +1,65 @@
+import os
+import subprocess
+import tempfile
+import time
+
+os.environ["INTERACTIVE_ZSERIO_PYTHON_MEMORY_MB"] = "256"
+
+from interactive_zserio.python_pool import PythonPool, CPU_TIME_METRIC
+from interactive_zserio.metrics import Metrics
+
+def wait_for_warm_worker(python_pool):
+    for _ in range(100):
+        if not python_pool._idle.empty():
+            return
+        time.sleep(0.1)
+    assert False, "no warm worker"
+
+def check(python_pool):
+    with tempfile.TemporaryDirectory() as cwd:
+        with open(os.path.join(cwd, "module.py"), "w") as f:
+            f.write("VALUE = 42\n")
+
+        # runs like "python -c" with the working directory in the path
+        completed_process = python_pool.run("import module, os, sys\nprint(module.VALUE, os.getcwd())\n"
+                                            "print('err', file=sys.stderr)", cwd, 5)
+        assert completed_process.returncode == 0, completed_process
+        assert completed_process.stdout == f"42 {os.path.realpath(cwd)}\n", completed_process.stdout
+        assert completed_process.stderr == "err\n"
+
+        completed_process = python_pool.run("import sys\nsys.exit(3)", cwd, 5)
+        assert completed_process.returncode == 3
+
+        completed_process = python_pool.run("raise ValueError('failed')", cwd, 5)
+        assert completed_process.returncode == 1
+        assert "ValueError: failed" in completed_process.stderr
+
+        # address space limit
+        completed_process = python_pool.run("data = bytearray(512 * 1024 * 1024)", cwd, 5)
+        assert completed_process.returncode != 0
+        assert "MemoryError" in completed_process.stderr, completed_process.stderr
+
+        # wall time limit
+        start = time.monotonic()
+        try:
+            python_pool.run("import time\ntime.sleep(10)", cwd, 1)
+            assert False
+        except subprocess.TimeoutExpired:
+            pass
+        assert time.monotonic() - start < 5
+
+# warm forked children
+python_pool = PythonPool(1)
+wait_for_warm_worker(python_pool)
+check(python_pool)
+# the pool keeps working after the timeout
+assert python_pool.run("print('ok')", tempfile.gettempdir(), 5).stdout == "ok\n"
+
+# cold runs
+check(PythonPool(0))
+
+# CPU time of the user code is accounted to the session, not the time spent by waiting
+python_pool.run("import time\ntime.sleep(0.5)", tempfile.gettempdir(), 5, "sleeping")
+python_pool.run("sum(range(10 ** 7))", tempfile.gettempdir(), 5, "computing")
+assert Metrics.instance().snapshot("sleeping")[CPU_TIME_METRIC]["total"] < 0.25
+assert Metrics.instance().snapshot("computing")[CPU_TIME_METRIC]["total"] > 0.05
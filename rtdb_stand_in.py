@@ -0,0 +1,117 @@
+import json
+import threading
+
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+class RTDBStandIn:
+    # minimal in-memory stand-in of the Firebase realtime database REST API
+    def __init__(self):
+        self.data = {}
+        self.requests = []
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(self))
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def fail_next(self, count):
+        # next requests get 503 to exercise the retries
+        self.failures = count
+
+    def handle(self, method, path, query, body):
+        with self._lock:
+            self.requests.append((method, path, body))
+            if self.failures:
+                self.failures -= 1
+                return HTTPStatus.SERVICE_UNAVAILABLE, {"error": "unavailable"}
+
+            keys = [key for key in path.removesuffix(".json").split("/") if key]
+            if method == "GET":
+                return HTTPStatus.OK, self._query(self._get(keys), query)
+            if method == "PUT":
+                self._set(keys, body)
+                return HTTPStatus.OK, body
+            if method == "PATCH":
+                for key, value in body.items():
+                    self._set(keys + key.split("/"), value)
+                return HTTPStatus.OK, body
+            if method == "DELETE":
+                self._set(keys, None)
+                return HTTPStatus.OK, None
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "method not allowed"}
+
+    def _get(self, keys):
+        node = self.data
+        for key in keys:
+            if not isinstance(node, dict) or key not in node:
+                return None
+            node = node[key]
+        return node
+
+    def _set(self, keys, value):
+        if not keys:
+            self.data = value if value is not None else {}
+            return
+        node = self.data
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+        if value is None:
+            node.pop(keys[-1], None)
+        else:
+            node[keys[-1]] = value
+
+    @staticmethod
+    def _query(value, query):
+        if isinstance(value, dict) and query.get("shallow") == ["true"]:
+            return {key: True for key in value}
+        if not isinstance(value, dict) or "orderBy" not in query:
+            return value
+        order_by = json.loads(query["orderBy"][0])
+        if order_by == "$value":
+            items = [(key, child, child) for key, child in value.items() if not isinstance(child, dict)]
+        else:
+            items = [(key, child, child[order_by]) for key, child in value.items()
+                     if isinstance(child, dict) and order_by in child]
+        if "endAt" in query:
+            end_at = json.loads(query["endAt"][0])
+            items = [item for item in items if item[2] <= end_at]
+        items.sort(key=lambda item: item[2])
+        if "limitToFirst" in query:
+            items = items[:int(query["limitToFirst"][0])]
+        return {key: child for key, child, _ in items}
+
+def _make_handler(stand_in):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _handle(self):
+            url = urlsplit(self.path)
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length)) if length else None
+            status, response = stand_in.handle(self.command, url.path, parse_qs(url.query), body)
+            content = json.dumps(response).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        do_GET = do_PUT = do_PATCH = do_DELETE = _handle
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
@@ -0,0 +1,72 @@
+import threading
+
+from interactive_zserio.scheduler import Scheduler
+
+scheduler = Scheduler(1)
+order = []
+
+def record(name, event=None):
+    if event is not None:
+        event.wait()
+    order.append(name)
+    return name
+
+def fail():
+    raise ValueError("job failed")
+
+# the only worker is blocked, thus all other jobs are queued
+release = threading.Event()
+blocker = scheduler.submit("blocker", None, record, "blocker", release)
+while blocker.started is None:
+    threading.Event().wait(0.01)
+
+a1 = scheduler.submit("a", "a1", record, "a1")
+a2 = scheduler.submit("a", "a2", record, "a2")
+a3 = scheduler.submit("a", "a3", record, "a3")
+b1 = scheduler.submit("b", "b1", record, "b1")
+
+# jobs with the same key are coalesced while they are pending, also across sessions
+assert scheduler.submit("b", "a2", record, "a2 again") is a2
+assert scheduler.stats["queue_depth"] == 4
+
+# the session waits also for the coalesced job
+assert scheduler.session_jobs("a") == 3
+assert scheduler.session_jobs("b") == 2
+assert scheduler.session_jobs("blocker") == 1
+
+# sessions are served round-robin, each of them in FIFO order
+assert blocker.position is None
+assert [a1.position, b1.position, a2.position, a3.position] == [1, 2, 3, 4]
+
+release.set()
+for job in (a1, a2, a3, b1):
+    job.result(timeout=10)
+assert order == ["blocker", "a1", "b1", "a2", "a3"], order
+assert a2.result() == "a2"
+
+# finished jobs are not coalesced anymore
+a2_rerun = scheduler.submit("a", "a2", record, "a2 rerun")
+assert a2_rerun is not a2
+assert a2_rerun.result(timeout=10) == "a2 rerun"
+
+# exceptions are raised by result()
+failed = scheduler.submit("a", None, fail)
+try:
+    failed.result(timeout=10)
+    assert False
+except ValueError as e:
+    assert str(e) == "job failed"
+
+# statistics are updated right after the result is set
+for _ in range(100):
+    stats = scheduler.stats
+    if stats["completed"] == 7:
+        break
+    threading.Event().wait(0.01)
+assert stats["completed"] == 7 and stats["queue_depth"] == 0 and stats["running"] == 0, stats
+assert scheduler.session_time("a") > 0.0
+assert scheduler.session_jobs("a") == 0 and scheduler.session_jobs("b") == 0
+
+# jobs know the session which submitted them, e.g. to account their CPU time
+assert scheduler.submit("b", None, Scheduler.current_session_id).result(timeout=10) == "b"
+assert Scheduler.current_session_id() is None
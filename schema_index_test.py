@@ -0,0 +1,63 @@
+import os
+import tempfile
+import time
+
+from interactive_zserio.schema_index import SchemaIndex
+
+def write(path, content):
+    os.makedirs(os.path.dirname(os.path.join(zs_dir, path)), exist_ok=True)
+    with open(os.path.join(zs_dir, path), "w") as f:
+        f.write(content)
+
+tmp_dir = tempfile.TemporaryDirectory()
+zs_dir = tmp_dir.name
+
+write("main.zs", """package main;
+
+import a.b.*;
+import c.Symbol;
+import
+    d . e . *;
+// import commented.line.*;
+/* import commented.block.*;
+   import commented.block2.*; */
+import missing.*;
+
+struct Main { uint8 x; };
+""")
+write("a/b.zs", "package a.b;\n\nimport a.shared.*;\n")
+write("a/shared.zs", "package a.shared;\n\nimport main.*; // cycle\n")
+write("c.zs", "package c;\n")
+write("d/e.zs", "package d.e;\n")
+write("commented/line.zs", "package commented.line;\n")
+write("commented/block.zs", "package commented.block;\n")
+write("unrelated.zs", "package unrelated;\n")
+
+schema_index = SchemaIndex(zs_dir)
+
+# wildcard, single symbol, split and cyclic imports, commented-out imports are ignored
+closure = schema_index.closure("main.zs")
+assert set(closure) == {"main.zs", "a/b.zs", "a/shared.zs", "c.zs", "c/Symbol.zs", "d/e.zs", "missing.zs"}, closure
+assert closure["missing.zs"] is None
+assert closure["c/Symbol.zs"] is None
+
+# the digest changes only with files of the closure
+digest = schema_index.digest("main.zs")
+assert schema_index.digest("main.zs") == digest
+write("unrelated.zs", "package unrelated;\n\nstruct U { uint8 u; };\n")
+assert schema_index.digest("main.zs") == digest
+
+time.sleep(0.01) # make sure that mtime changes
+write("a/shared.zs", "package a.shared;\n\nstruct Shared { uint8 s; };\n")
+changed_digest = schema_index.digest("main.zs")
+assert changed_digest != digest
+
+# a missing import which appears changes the digest as well
+write("missing.zs", "package missing;\n")
+assert schema_index.digest("main.zs") != changed_digest
+assert schema_index.closure("main.zs")["missing.zs"] is not None
+
+# content known by the writer is used without re-reading of the file
+write("c.zs", "package c;\n\nimport d.e.*;\n")
+schema_index.update("c.zs", "package c;\n\nimport d.e.*;\n")
+assert schema_index.closure("c.zs").keys() == {"c.zs", "d/e.zs"}
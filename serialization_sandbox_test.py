@@ -0,0 +1,123 @@
+import importlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import zserio
+
+# real compilations, not the entries left in the shared cache by others
+cache_dir = tempfile.TemporaryDirectory(prefix="interactive_zserio_test_cache_")
+os.environ["INTERACTIVE_ZSERIO_CACHE_DIR"] = cache_dir.name
+
+from interactive_zserio import serialization_sandbox
+from interactive_zserio.compile_service import CompileService
+from interactive_zserio.serialization_bench import _run_sandbox, BENCH_BUDGET, BENCH_TIMEOUT_MARGIN, MAX_INSTANCES
+from interactive_zserio.serialization_sandbox import Synthesizer, RESPONSE_MARKER
+from interactive_zserio.blob_inspector import InspectorProcess, INSPECTOR_MEMORY_LIMIT
+
+SCHEMA="""package bench;
+
+enum uint8 Color { RED, GREEN, BLUE };
+bitmask uint8 Flags { READ, WRITE };
+
+struct Inner(uint8 width)
+{
+    bit<width> value;
+};
+
+choice Selected(Color color) on color
+{
+    case RED:
+        uint16 red;
+    case GREEN:
+        string green;
+    default:
+        float32 other;
+};
+
+union Variant
+{
+    int32 number;
+    string text;
+};
+
+struct Data
+{
+    uint8 width : width > 0 && width <= 32;
+    Inner(width) inner;
+    Color color;
+    Selected(color) selected;
+    Flags flags;
+    Variant variant;
+    optional varuint32 maybe;
+    uint8 count;
+    int16 values[count];
+    string names[];
+    bytes data;
+    extern ext;
+    Data recursive[];
+};
+"""
+
+def respond(completed_process):
+    assert completed_process.returncode == 0, completed_process.stderr
+    return json.loads(completed_process.stdout.split(RESPONSE_MARKER, 1)[1])
+
+tmp_dir = tempfile.TemporaryDirectory()
+zs_dir = os.path.join(tmp_dir.name, "zs")
+gen_dir = os.path.join(tmp_dir.name, "gen")
+os.makedirs(zs_dir)
+with open(os.path.join(zs_dir, "bench.zs"), "w") as f:
+    f.write(SCHEMA)
+results = CompileService(zs_dir, gen_dir).compile("bench.zs", "-withTypeInfoCode", ["python"])
+assert all(result.success for result in results), [result.completed_process.stderr for result in results]
+assert all(result.source != "cached" for result in results)
+python_dir = os.path.join(gen_dir, "python")
+
+# both sandboxes list the compounds which can be read without arguments
+compounds = respond(_run_sandbox({"command": "list"}, python_dir, None))
+assert [compound["name"] for compound in compounds] == ["bench.Data", "bench.Variant"], compounds
+inspector_process = InspectorProcess(python_dir, INSPECTOR_MEMORY_LIMIT)
+assert inspector_process.call({"command": "list"})["types"] == compounds
+inspector_process.kill()
+
+# synthesized instances are valid, they survive a round trip, and the same seed gives the same instances
+sys.path.insert(0, python_dir)
+data_type = importlib.import_module("bench.data").Data
+def synthesize(seed, count):
+    synthesizer = Synthesizer(random.Random(seed))
+    instances = []
+    while len(instances) < count:
+        try:
+            instances.append(synthesizer.create(data_type.type_info()))
+        except serialization_sandbox.SynthesisError:
+            pass
+    return instances
+
+instances = synthesize(1, 50)
+for instance in instances:
+    assert 0 < instance.width <= 32
+    assert len(instance.values) == instance.count
+    assert 0 <= instance.inner.value < 1 << instance.width
+    data = zserio.serialize_to_bytes(instance)
+    assert zserio.deserialize_from_bytes(data_type, data) == instance
+assert instances == synthesize(1, 50)
+assert instances != synthesize(2, 50)
+
+# the benchmark stops within its budget even when the requested number of instances can't be created in time
+os.chdir(python_dir)
+start = time.perf_counter()
+result = serialization_sandbox.run("bench.data", "Data", MAX_INSTANCES, 0, 1)
+assert time.perf_counter() - start < 2, time.perf_counter() - start
+assert 0 < result["instances"] < MAX_INSTANCES, result
+assert result["instances"] <= result["attempts"]
+assert all(result[operation]["per_second"] > 0 for operation in ("write", "read", "bitsizeof"))
+
+# the same in the sandbox with the budget of the application
+start = time.perf_counter()
+result = respond(_run_sandbox({"command": "run", "module": "bench.data", "class": "Data", "count": MAX_INSTANCES,
+                               "seed": 0, "budget": BENCH_BUDGET}, python_dir, None))
+assert time.perf_counter() - start < BENCH_BUDGET + BENCH_TIMEOUT_MARGIN
+assert 0 < result["instances"] < MAX_INSTANCES, result
@@ -0,0 +1,121 @@
+import os
+import time
+
+from rtdb_stand_in import RTDBStandIn
+
+rtdb = RTDBStandIn().start()
+os.environ["INTERACTIVE_ZSERIO_RTDB_URL"] = rtdb.url
+
+from streamlit.testing.v1 import AppTest
+
+def share_button(app_test):
+    return next(button for button in app_test.button if button.label == "Save & Share Workspace")
+
+# shares not used for more than a year are deleted in background
+rtdb.data = {
+    "user_metadata": {
+        "old": {"created": "2000-01-01", "last_used": "2000-01-01", "owner_id": "owner"},
+        "recent": {"created": "2000-01-01", "last_used": "2999-01-01", "owner_id": "owner"}
+    },
+    "user_workspaces": {"old": {"ws": {}}, "recent": {"ws": {}}}
+}
+
+app_test = AppTest.from_file("interactive_zserio.py")
+app_test.run(timeout=30)
+assert not app_test.exception
+
+for _ in range(50):
+    if "old" not in rtdb.data["user_metadata"]:
+        break
+    time.sleep(0.1)
+assert "old" not in rtdb.data["user_metadata"] and "old" not in rtdb.data["user_workspaces"]
+assert "recent" in rtdb.data["user_metadata"] and "recent" in rtdb.data["user_workspaces"]
+
+# share, the first requests fail and must be retried
+
+rtdb.fail_next(2)
+share_button(app_test).click().run(timeout=30)
+assert not app_test.exception
+
+share_id = app_test.session_state["main_view_share_id"]
+owner_id = app_test.session_state["main_view_owner_id"]
+assert rtdb.data["user_metadata"][share_id]["owner_id"] == owner_id
+shared = rtdb.data["user_workspaces"][share_id]
+assert shared["version"] == 2
+assert [src["name"] for src in shared["ws"]["zs"]] == ["sample.zs"]
+assert all(src["hash"] in rtdb.data["user_blobs"] for src in shared["ws"]["zs"])
+
+# shared content is stored only once
+blobs = dict(rtdb.data["user_blobs"])
+requests_count = len(rtdb.requests)
+share_button(app_test).click().run(timeout=30)
+assert not app_test.exception
+assert app_test.session_state["main_view_share_id"] == share_id
+assert rtdb.data["user_blobs"] == blobs
+assert not [path for _, path, _ in rtdb.requests[requests_count:] if path == "/user_blobs.json"]
+assert set(rtdb.data["user_blobs_last_used"]) == set(blobs)
+
+# blobs expired meanwhile by another server process are uploaded again
+del rtdb.data["user_blobs"][shared["ws"]["zs"][0]["hash"]]
+share_button(app_test).click().run(timeout=30)
+assert not app_test.exception
+assert rtdb.data["user_blobs"] == blobs
+
+# restore the shared workspace in a new session
+app_test = AppTest.from_file("interactive_zserio.py")
+app_test.query_params["share_id"] = share_id
+app_test.run(timeout=30)
+assert not app_test.exception
+assert app_test.session_state["main_view_share_id"] == share_id
+assert app_test.session_state["main_view_schema_mode"] == "write"
+assert app_test.session_state["schema_file_manager_selected_file"] == "sample.zs"
+
+# popular shares are served from the memory
+requests_count = len(rtdb.requests)
+app_test = AppTest.from_file("interactive_zserio.py")
+app_test.query_params["share_id"] = share_id
+app_test.run(timeout=30)
+assert not app_test.exception
+assert app_test.session_state["schema_file_manager_selected_file"] == "sample.zs"
+assert not [path for _, path, _ in rtdb.requests[requests_count:] if path.startswith("/user_workspaces")]
+
+# old format of shares is still supported
+rtdb.data["user_workspaces"]["v1"] = {
+    "ws": {"zs": [{"name": "v1.zs", "content": "package v1;\n"}], "src": {}},
+    "generator": {"generators": {"python": True}, "extra_args": ""},
+    "python_runner": False
+}
+app_test = AppTest.from_file("interactive_zserio.py")
+app_test.query_params["share_id"] = "v1"
+app_test.run(timeout=30)
+assert not app_test.exception
+assert app_test.session_state["main_view_share_id"] == "v1"
+assert app_test.session_state["schema_file_manager_selected_file"] == "v1.zs"
+
+# blobs stored by another server process are not uploaded again
+from interactive_zserio.share_storage import ShareStorage
+requests_count = len(rtdb.requests)
+assert ShareStorage.instance().save("other", "owner", shared, dict.fromkeys(blobs, "ignored"))
+assert rtdb.data["user_blobs"] == blobs
+assert not [path for _, path, _ in rtdb.requests[requests_count:] if path == "/user_blobs.json"]
+
+# expired blobs are deleted
+blob_hash = shared["ws"]["zs"][0]["hash"]
+rtdb.data["user_blobs_last_used"][blob_hash] = "2000-01-01"
+requests_count = len(rtdb.requests)
+ShareStorage.instance().expire("2001-01-01")
+assert blob_hash not in rtdb.data["user_blobs"] and blob_hash not in rtdb.data["user_blobs_last_used"]
+assert len(rtdb.data["user_blobs"]) == len(rtdb.data["user_blobs_last_used"]) == len(blobs) - 1
+# the expiry doesn't download the data of the blobs
+assert not [path for method, path, _ in rtdb.requests[requests_count:]
+            if method == "GET" and path == "/user_blobs.json"]
+
+# unavailable backend doesn't break the app
+rtdb.fail_next(100)
+app_test = AppTest.from_file("interactive_zserio.py")
+app_test.query_params["share_id"] = "unavailable"
+app_test.run(timeout=60)
+assert not app_test.exception
+assert app_test.session_state["main_view_schema_mode"] == "sample"
+
+rtdb.stop()
@@ -0,0 +1,54 @@
+import os
+import sqlite3
+import tempfile
+import time
+
+db_dir = tempfile.TemporaryDirectory()
+db_path = os.path.join(db_dir.name, "shares.db")
+os.environ["INTERACTIVE_ZSERIO_SHARE_STORAGE"] = "sqlite"
+os.environ["INTERACTIVE_ZSERIO_SHARE_DB"] = db_path
+
+# shares not used for more than a year are deleted in background
+with sqlite3.connect(db_path) as connection:
+    connection.execute("CREATE TABLE shares (share_id TEXT PRIMARY KEY, owner_id TEXT NOT NULL, "
+                       "created TEXT NOT NULL, last_used TEXT NOT NULL, manifest TEXT NOT NULL)")
+    connection.execute("INSERT INTO shares VALUES ('old', 'owner', '2000-01-01', '2000-01-01', '{}')")
+    connection.execute("INSERT INTO shares VALUES ('recent', 'owner', '2000-01-01', '2999-01-01', '{}')")
+
+from streamlit.testing.v1 import AppTest
+
+def share_button(app_test):
+    return next(button for button in app_test.button if button.label == "Save & Share Workspace")
+
+def share_ids():
+    with sqlite3.connect(db_path) as connection:
+        return set(row[0] for row in connection.execute("SELECT share_id FROM shares"))
+
+app_test = AppTest.from_file("interactive_zserio.py")
+app_test.run(timeout=30)
+assert not app_test.exception
+
+for _ in range(50):
+    if "old" not in share_ids():
+        break
+    time.sleep(0.1)
+assert share_ids() == {"recent"}
+
+# share and restore
+share_button(app_test).click().run(timeout=30)
+assert not app_test.exception
+share_id = app_test.session_state["main_view_share_id"]
+assert share_ids() == {"recent", share_id}
+
+from interactive_zserio.share_storage import ShareStorage
+manifest = ShareStorage.instance().load(share_id)
+assert manifest["version"] == 2
+blobs = ShareStorage.instance().load_blobs([src["hash"] for src in manifest["ws"]["zs"]])
+assert "package sample;" in "".join(blobs.values())
+
+app_test = AppTest.from_file("interactive_zserio.py")
+app_test.query_params["share_id"] = share_id
+app_test.run(timeout=30)
+assert not app_test.exception
+assert app_test.session_state["main_view_share_id"] == share_id
+assert app_test.session_state["schema_file_manager_selected_file"] == "sample.zs"
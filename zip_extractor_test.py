@@ -0,0 +1,104 @@
+import io
+import os
+import tempfile
+import zipfile
+
+import streamlit as st
+
+from interactive_zserio.zip_extractor import ZipExtractor, ZipLimitError
+from interactive_zserio.workspace import Workspace
+from interactive_zserio.uploader import Uploader
+
+def make_zip(files, compression=zipfile.ZIP_DEFLATED):
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w", compression) as zip_file:
+        for name, content in files.items():
+            zip_file.writestr(name, content)
+    data.seek(0)
+    return data
+
+def extract(files, accept=lambda name: True, **limits):
+    with zipfile.ZipFile(make_zip(files)) as zip_file:
+        extractor = ZipExtractor(zip_file, **limits)
+        members = extractor.select(accept)
+        return {name: b"".join(chunks) for name, chunks in extractor.extract(members, lambda name: name)}
+
+def rejected(files, message, **limits):
+    try:
+        extract(files, **limits)
+    except ZipLimitError as e:
+        assert message in str(e), str(e)
+        return True
+    return False
+
+assert extract({"a.zs": b"package a;\n", "b/c.zs": b"package b.c;\n", "readme.txt": b"text"},
+               lambda name: name.endswith(".zs")) == {"a.zs": b"package a;\n", "b/c.zs": b"package b.c;\n"}
+
+# path traversal, also in files which wouldn't be selected
+assert rejected({"../evil.zs": b""}, "Invalid path")
+assert rejected({"a/../../evil.zs": b""}, "Invalid path")
+assert rejected({"/abs.zs": b""}, "Invalid path")
+assert rejected({"a\\..\\evil.zs": b""}, "Invalid path")
+assert rejected({"a.zs": b"", "../evil.txt": b""}, "Invalid path", accept=lambda name: name.endswith(".zs"))
+
+# limits
+assert rejected({"bomb.zs": b"\0" * (2 * 1024 * 1024)}, "compression ratio", max_ratio=100)
+assert not rejected({"small.zs": b"\0" * (512 * 1024)}, "compression ratio", max_ratio=100)
+assert rejected({f"{i}.zs": b"" for i in range(11)}, "Too many files", max_files=10)
+assert not rejected({f"{i}.zs": b"" for i in range(10)}, "Too many files", max_files=10)
+assert rejected({"large.zs": os.urandom(2048)}, "too large", max_file_size=1024)
+assert rejected({"a.zs": os.urandom(600), "b.zs": os.urandom(600)}, "Archive is too large", max_size=1024)
+assert not rejected({"a.zs": os.urandom(600), "b.zs": os.urandom(600)}, "too large",
+                    max_size=2048, max_file_size=1024)
+
+# rejected uploads don't leave partially extracted workspace and the generated files are regenerated
+class UploadedFile(io.BytesIO):
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+tmp_dir = tempfile.TemporaryDirectory()
+workspace = Workspace(os.path.join(tmp_dir.name, "workspace"))
+resets = []
+uploader = Uploader(tmp_dir.name, workspace, lambda: resets.append(True))
+
+def upload(name, data):
+    st.session_state["uploader_uploaded_schema"] = UploadedFile(name, data)
+    uploader._on_change()
+
+def workspace_files():
+    return sorted(os.path.relpath(os.path.join(root, name), workspace.ws_dir)
+                  for root, _, names in os.walk(workspace.ws_dir) for name in names)
+
+with open(os.path.join(workspace.gen_dir, "generated.py"), "w") as f:
+    f.write("")
+upload("workspace.zip", make_zip({"workspace/zs/a.zs": b"package a;\n",
+                                  "workspace/src/python/main.py": b"print()\n",
+                                  "workspace/gen/python/a.py": b""}).getvalue())
+assert workspace_files() == ["src/python/main.py", "zs/a.zs"], workspace_files()
+assert resets == [True]
+
+upload("schema.zip", make_zip({"a.zs": b"package a;\n", "b.zs": os.urandom(9 * 1024 * 1024)},
+                              zipfile.ZIP_STORED).getvalue())
+assert workspace_files() == [], workspace_files()
+assert resets == [True, True]
+
+# the corrupted file is found only after the first file is extracted
+upload("workspace.zip", make_zip({"workspace/zs/a.zs": b"package a;\n"}).getvalue())
+corrupted = make_zip({"a.zs": b"package a;\n", "b.zs": b"package b;\n"}, zipfile.ZIP_STORED).getvalue()
+corrupted = corrupted.replace(b"package b;", b"package x;")
+upload("schema.zip", corrupted)
+assert workspace_files() == [], workspace_files()
+assert resets == [True, True, True, True]
+
+# corrupted deflate data of the second file
+upload("workspace.zip", make_zip({"workspace/zs/a.zs": b"package a;\n"}).getvalue())
+corrupted = bytearray(make_zip({"a.zs": b"package a;\n", "b.zs": b"package b;\n" * 100}).getvalue())
+with zipfile.ZipFile(io.BytesIO(bytes(corrupted))) as zip_file:
+    info = zip_file.getinfo("b.zs")
+data_offset = info.header_offset + 30 + len(info.filename)
+corrupted[data_offset:data_offset + info.compress_size] = b"\xff" * info.compress_size
+upload("schema.zip", bytes(corrupted))
+assert workspace_files() == [], workspace_files()
+assert resets == [True, True, True, True, True, True]